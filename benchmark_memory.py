@@ -0,0 +1,48 @@
+# benchmark of the memory used per pose (rotation or homogeneous
+# transformation) by the different classes, e.g. try
+#   python benchmark_memory.py
+#   python benchmark_memory.py 100000     # number of poses
+#
+# memory is measured with tracemalloc (python 3.4 or newer)
+from __future__ import division, print_function  # to improve compatibility with python 3
+
+import sys
+import tracemalloc
+
+from groups import *
+from quaternions import *
+
+def bytes_per_pose(make,n):
+    """memory in bytes per pose, for n poses made by the function make(angles)"""
+    angles = np.linspace(0,360,n)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    poses = make(angles)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del poses
+    return (after-before)/n
+
+def _with_hom_inv(H):
+    H.hom_inv # calculates (and stores) the inverse
+    return H
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    benchmarks = [
+        ("so3",         lambda angles: [so3(a) for a in angles]),
+        ("so3_compact", lambda angles: [so3_compact(a) for a in angles]),
+        ("so3q",        lambda angles: [so3q(a) for a in angles]),
+        ("so3_array",   lambda angles: so3_array(angles)),
+        ("se3",         lambda angles: [se3([1,2,3],a) for a in angles]),
+        ("se3, with hom_inv", lambda angles: [_with_hom_inv(se3([1,2,3],a)) for a in angles]),
+        ("se3_compact", lambda angles: [se3_compact([1,2,3],a) for a in angles]),
+        ("se3q",        lambda angles: [se3q([1,2,3],a) for a in angles]),
+        ("se3_array",   lambda angles: se3_array([se3([1,2,3],a) for a in angles])),
+        ("dualquat",    lambda angles: dualquat([se3([1,2,3],a) for a in angles])),
+        ]
+
+    print("memory per pose, for {0} poses:".format(n))
+    for name,make in benchmarks:
+        print("{0:20s} {1:8.0f} bytes".format(name,bytes_per_pose(make,n)))
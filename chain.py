@@ -0,0 +1,546 @@
+# This module chain.py provides the python class chain, a serial chain of
+# links specified by their Denavit-Hartenberg parameters, for the forward
+# kinematics without visualization (it does not depend on visual), e.g. on a
+# server. A chain can be attached to link objects (see links.py) to show its
+# configuration.
+#
+# The Denavit-Hartenberg convention is the same as in links.py (and in the
+# book of Spong, Hutchinson and Vidyasagar), the transformation of link i is
+#   A_i = Rot_z(theta_i) Trans_z(d_i) Trans_x(a_i) Rot_x(alpha_i)
+# where for a revolute joint q_i is added to theta_i, and for a prismatic
+# joint q_i is added to d_i.
+#
+# Dependencies:
+# numpy:              for matrices, vectors and linear algebra
+# groups.py:          se3 class
+
+# Author:    Rufus Fraanje, p.r.fraanje@hhs.nl
+
+
+from __future__ import division, print_function  # to improve compatibility with python 3
+
+import math
+import numpy as np             # numpy for matrix/vector calc.: http://numpy.scipy.org
+
+from groups import *
+
+# arrays of configurations are processed in blocks of this number of
+# configurations, such that the intermediate arrays fit in the cache
+_block = 4096
+
+
+def dh(a,alpha,d,theta):
+    """homogeneous transformation matrices (...x4x4) of links with the
+    Denavit-Hartenberg parameters a, alpha, d and theta (angles in rad), in
+    closed form, the parameters can be arrays (with broadcasting)
+    Example:
+    >>> dh(1,np.pi/2,0,np.linspace(0,np.pi,100))    # 100x4x4
+    """
+    a, alpha, d, theta = np.broadcast_arrays(*[np.asarray(x,dtype=float) for x in (a,alpha,d,theta)])
+    ct, st = np.cos(theta), np.sin(theta)
+    ca, sa = np.cos(alpha), np.sin(alpha)
+    H = np.zeros(a.shape+(4,4))
+    H[...,0,0] = ct
+    H[...,0,1] = -st*ca
+    H[...,0,2] = st*sa
+    H[...,0,3] = a*ct
+    H[...,1,0] = st
+    H[...,1,1] = ct*ca
+    H[...,1,2] = -ct*sa
+    H[...,1,3] = a*st
+    H[...,2,1] = sa
+    H[...,2,2] = ca
+    H[...,2,3] = d
+    H[...,3,3] = 1
+    return H
+
+
+# serial chain of links, specified by Denavit-Hartenberg parameters
+class chain(object):
+    def __init__(self,a,alpha,d,theta,joint='r',q=None,unit='deg',base=None):
+        """initialization of object, with the Denavit-Hartenberg parameters
+        a, alpha, d and theta of the links (one value per link), joint is a
+        string with per link 'r' (revolute) or 'p' (prismatic) (one character
+        is used for all links), q are the joint variables (default 0), alpha,
+        theta and q of revolute joints are in degrees (default) or radians
+        (unit='rad'), base is the pose (se3 or 4x4 array) of frame 0 relative
+        to the world
+        Example:
+        >>> R = chain(a=[1,1],alpha=[0,0],d=[0,0],theta=[0,0],joint='rr')
+        >>> R.fk([30,45])                       # se3 object of frame 2
+        """
+        self.__a     = np.array(a,dtype=float).reshape(-1)
+        self.__d     = np.array(d,dtype=float).reshape(-1)
+        dof = len(self.__a)
+        if len(joint) == 1:
+            joint = joint*dof
+        if not (len(self.__d) == dof and len(np.ravel(alpha)) == dof and len(np.ravel(theta)) == dof and len(joint) == dof):
+            raise ValueError("({0}, __init__): a, alpha, d, theta and joint should have the same length.".format(self.__class__.__name__))
+        if any(j not in ('r','p') for j in joint):
+            raise ValueError("({0}, __init__): joint should contain 'r' (revolute) or 'p' (prismatic) per link.".format(self.__class__.__name__))
+        if unit not in ('deg','rad'):
+            raise ValueError("({0}, __init__): unit should be 'deg' or 'rad'.".format(self.__class__.__name__))
+
+        self.__joint = ''.join(joint)
+        self.__revolute = np.array([j == 'r' for j in joint])
+        self.__unit = unit
+        # factor from the unit of the angles to radians
+        self.__to_rad = np.pi/180 if unit == 'deg' else 1.
+        self.__alpha = np.array(alpha,dtype=float).reshape(-1)*self.__to_rad
+        self.__theta = np.array(theta,dtype=float).reshape(-1)*self.__to_rad
+        # factors from q to radians (revolute) or length (prismatic)
+        self.__q_scale = np.where(self.__revolute,self.__to_rad,1.)
+        if base is None:
+            self.__base = np.eye(4)
+        elif isinstance(base,se3):
+            self.__base = base.hom.copy()
+        else:
+            self.__base = np.array(base,dtype=float).reshape((4,4))
+        # the transformations of the links for q = 0, A_i is Rot_z(q_i) times
+        # this (revolute joint) or Trans_z(q_i) times this (prismatic joint)
+        self.__const_rows = dh(self.__a,self.__alpha,self.__d,self.__theta).tolist()
+        self.__links = None
+        self.__q = np.zeros(dof)
+        # cache of the poses of the link frames for q (the products of the
+        # base and the first i+1 link transformations), of which the first
+        # __nvalid are up to date, see _update()
+        self.__frames = np.empty((dof,4,4))
+        self.__nvalid = 0
+        if q is not None:
+            self.q = q
+
+    @classmethod
+    def from_links(cls,links):
+        """chain with the Denavit-Hartenberg parameters, joint variables and
+        base (pose of links[0].frame_rel) of the link objects (see links.py),
+        which are attached to the chain, see attach()"""
+        units = set(L.unit for L in links)
+        if len(units) != 1:
+            raise ValueError("({0}, from_links): all links should have the same unit.".format(cls.__name__))
+        ret = cls(a=[L.a for L in links],alpha=[L.alpha for L in links],d=[L.d for L in links],
+                  theta=[L.theta for L in links],joint=''.join(L.joint for L in links),
+                  q=[L.q for L in links],unit=units.pop(),base=links[0].frame_rel.hom_world())
+        ret.attach(links)
+        return ret
+
+    def attach(self,links):
+        """attaches link objects (see links.py) to the chain, which are
+        updated (i.e. shown) each time the joint variables q are set, use
+        attach(None) to detach the links"""
+        if links is not None and len(links) != len(self):
+            raise ValueError("({0.__class__.__name__}, attach): number of links should be {1}.".format(self,len(self)))
+        self.__links = links
+        self.__update_links()
+
+    def __update_links(self,index=None):
+        """sets the joint variables of the attached links (with index)"""
+        if self.__links is not None:
+            if index is None:
+                index = range(len(self))
+            for i in index:
+                self.__links[i].q = self.__q[i]
+
+    def __repr__(self):
+        string =  "{0.__class__.__name__}: {1} links, joints = {0.joint}, unit = {0.unit}\n\n".format(self,len(self))
+        string += "   a          alpha      d          theta      q\n"
+        for i in range(len(self)):
+            string += "{0:10.5g} {1:10.5g} {2:10.5g} {3:10.5g} {4:10.5g}\n".format(self.a[i],self.alpha[i],self.d[i],self.theta[i],self.q[i])
+        string += "\nbase: \n" + self.__base.__repr__()
+        return string
+
+    def __len__(self):
+        return len(self.__a)
+
+    @property
+    def dof(self):
+        """number of links (degrees of freedom)"""
+        return len(self.__a)
+
+    @property
+    def joint(self):
+        return self.__joint
+
+    @property
+    def unit(self):
+        return self.__unit
+
+    @property
+    def a(self):
+        return self.__a.copy()
+
+    @property
+    def alpha(self):
+        return self.__alpha/self.__to_rad
+
+    @property
+    def d(self):
+        return self.__d.copy()
+
+    @property
+    def theta(self):
+        return self.__theta/self.__to_rad
+
+    @property
+    def base(self):
+        return se3._trusted(self.__base.copy())
+
+    @property
+    def links(self):
+        return self.__links
+
+    @property
+    def q(self):
+        """joint variables (in the unit of the chain for revolute joints)"""
+        return self.__q.copy()
+    @q.setter
+    def q(self,q):
+        q = np.array(q,dtype=float).reshape(-1)
+        if len(q) != len(self):
+            raise ValueError("({0.__class__.__name__}, q): q should have {1} elements.".format(self,len(self)))
+        # the frames before the first changed joint stay up to date
+        changed = np.flatnonzero(q != self.__q)
+        if len(changed) > 0:
+            self.__nvalid = min(self.__nvalid,changed[0])
+        self.__q = q
+        self.__update_links(changed)
+
+    def _update(self):
+        """returns the cached poses (dof x4x4) of the link frames for self.q,
+        only the poses from the first changed joint onwards are recalculated"""
+        k = self.__nvalid
+        if k < len(self):
+            H = self.__base if k == 0 else self.__frames[k-1]
+            for i in range(k,len(self)):
+                H = np.dot(H,self._link_hom(i,self.__q[i]))
+                self.__frames[i] = H
+            self.__nvalid = len(self)
+        return self.__frames
+
+    def _params(self,q):
+        """Denavit-Hartenberg parameters (a, alpha, d, theta in rad) of the
+        links for joint variables q (...x dof)"""
+        q = np.asarray(q,dtype=float)*self.__q_scale
+        theta = self.__theta + np.where(self.__revolute,q,0)
+        d = self.__d + np.where(self.__revolute,0,q)
+        return self.__a, self.__alpha, d, theta
+
+    def _link_hom(self,i,q):
+        """transformation (4x4) of link i for joint variable q (a scalar),
+        from the transformation for q = 0, using floats instead of numpy
+        operations, which is faster for a single link"""
+        C = self.__const_rows[i]
+        if self.__revolute[i]:
+            c, s = math.cos(q*self.__to_rad), math.sin(q*self.__to_rad)
+            return np.array([[c*x - s*y for x,y in zip(C[0],C[1])],
+                             [s*x + c*y for x,y in zip(C[0],C[1])],C[2],C[3]])
+        A = np.array(C)
+        A[2,3] += q
+        return A
+
+    def link_homs(self,q=None):
+        """homogeneous transformation matrices (... x dof x4x4) of the links,
+        relative to the previous link, for joint variables q (default self.q),
+        which can be an array of N configurations (N x dof)"""
+        if q is None:
+            q = self.__q
+        return dh(*self._params(q))
+
+    def frames(self,q=None):
+        """poses (... x dof x4x4) of the frames at the end of the links
+        relative to the world, for joint variables q (default self.q, for
+        which the poses are cached and after a change of q only recalculated
+        from the first changed joint onwards), q can be an array of N
+        configurations (N x dof)
+        Example:
+        >>> R = ur5()
+        >>> Q = np.random.uniform(-180,180,(100000,6))
+        >>> R.frames(Q)                         # 100000x6x4x4
+        """
+        if q is None:
+            return self._update().copy()
+        q = np.asarray(q,dtype=float)
+        if q.ndim == 1:
+            F = np.empty((len(self),4,4))
+            H = self.__base
+            for i in range(len(self)):
+                H = np.dot(H,self._link_hom(i,q[i]))
+                F[i] = H
+            return F
+        Q = q.reshape((-1,len(self)))
+        F = np.zeros(Q.shape+(4,4))
+        F[...,3,3] = 1
+        for k in range(0,len(Q),_block):
+            for i,(x,y,z,p) in enumerate(self._columns(Q[k:k+_block])):
+                F[k:k+_block,i,0:3,0] = x
+                F[k:k+_block,i,0:3,1] = y
+                F[k:k+_block,i,0:3,2] = z
+                F[k:k+_block,i,0:3,3] = p
+        return F.reshape(q.shape+(4,4))
+
+    def _columns(self,q):
+        """generator of the columns x, y, z (axes) and p (origin) (all ...x3)
+        of the poses of the frames at the end of the links for joint
+        variables q (... x dof), which are updated link by link with
+        A_i = Rot_z(theta_i) Trans_z(d_i) Trans_x(a_i) Rot_x(alpha_i)
+        as operations on whole arrays of columns, this avoids multiplying
+        (and storing) arrays of 4x4 matrices"""
+        a, alpha, d, theta = self._params(q)
+        ct, st = np.cos(theta)[...,None], np.sin(theta)[...,None]
+        ca, sa = np.cos(alpha), np.sin(alpha)
+        shape = theta.shape[:-1]+(3,)
+        x, y, z, p = [np.broadcast_to(self.__base[0:3,j],shape) for j in range(4)]
+        for i in range(len(self)):
+            x, y = ct[...,i,:]*x + st[...,i,:]*y, ct[...,i,:]*y - st[...,i,:]*x  # Rot_z(theta)
+            p = p + a[i]*x + d[...,i,None]*z                                      # Trans_z(d) Trans_x(a)
+            y, z = ca[i]*y + sa[i]*z, ca[i]*z - sa[i]*y                           # Rot_x(alpha)
+            yield x, y, z, p
+
+    def _fk(self,q):
+        """homogeneous transformation matrices (...x4x4) of the end of the
+        chain, for joint variables q (... x dof)"""
+        q = np.asarray(q,dtype=float)
+        if q.ndim == 1:
+            H = self.__base
+            for i in range(len(self)):
+                H = np.dot(H,self._link_hom(i,q[i]))
+            return H
+        for x,y,z,p in self._columns(q):
+            pass
+        H = np.zeros(q.shape[:-1]+(4,4))
+        H[...,0:3,0] = x
+        H[...,0:3,1] = y
+        H[...,0:3,2] = z
+        H[...,0:3,3] = p
+        H[...,3,3] = 1
+        return H
+
+    def fk(self,q=None):
+        """forward kinematics, returns the pose (se3 object) of the frame at
+        the end of the chain relative to the world, for joint variables q
+        (default self.q, see frames())
+        Example:
+        >>> R = ur5()
+        >>> R.fk([30,30,30,30,30,30]).hom
+        >>> R.q = [30,30,30,30,30,30]
+        >>> R.fk()                              # calculates all links
+        >>> R.q = [30,30,30,30,40,30]
+        >>> R.fk()                              # only calculates links 5 and 6
+        """
+        if q is None:
+            return se3._trusted(self._update()[-1].copy())
+        return se3._trusted(self._fk(np.reshape(q,len(self)).astype(float)))
+
+    def fk_array(self,q):
+        """forward kinematics of N configurations at once, returns the poses
+        (se3_array object) of the end of the chain for joint variables q
+        (N x dof), use frames(q) for the poses of all link frames
+        Example:
+        >>> R = ur5()
+        >>> Q = np.random.uniform(-180,180,(10**6,6))
+        >>> R.fk_array(Q).dis                   # 10**6 x3 positions
+        """
+        q = np.array(q,dtype=float).reshape((-1,len(self)))
+        H = np.empty((len(q),4,4))
+        for k in range(0,len(q),_block):
+            H[k:k+_block] = self._fk(q[k:k+_block])
+        return se3_array._trusted(H)
+
+    def _pose_axes(self,q):
+        """poses (...x4x4) of the end of the chain, and z-axes and origins
+        (both ... x dof+1 x3) of frame 0 (the base) up to frame dof, for
+        joint variables q (default self.q, or ... x dof), from one pass: the
+        one of frames() (with the cache) for one configuration, or the
+        column recursion of fk_array() for arrays of configurations"""
+        if q is None or np.ndim(q) == 1:
+            F = self.frames(q)
+            z = np.vstack((self.__base[0:3,2],F[:,0:3,2]))
+            o = np.vstack((self.__base[0:3,3],F[:,0:3,3]))
+            return F[-1], z, o
+        q = np.asarray(q,dtype=float)
+        H = np.zeros(q.shape[:-1]+(4,4))
+        z = np.empty(q.shape[:-1]+(len(self)+1,3))
+        o = np.empty(q.shape[:-1]+(len(self)+1,3))
+        z[...,0,:] = self.__base[0:3,2]
+        o[...,0,:] = self.__base[0:3,3]
+        for i,(x,y,zi,p) in enumerate(self._columns(q)):
+            z[...,i+1,:] = zi
+            o[...,i+1,:] = p
+        H[...,0:3,0] = x
+        H[...,0:3,1] = y
+        H[...,0:3,2] = zi
+        H[...,0:3,3] = p
+        H[...,3,3] = 1
+        return H, z, o
+
+    def _jacobian(self,z,o):
+        """geometric Jacobians (... x6x dof) from the z-axes and origins of
+        the frames (see _pose_axes()), column i is [z_i-1 x (o_n - o_i-1); z_i-1]
+        for a revolute joint and [z_i-1; 0] for a prismatic joint"""
+        zi, oi = z[...,:-1,:], o[...,:-1,:]
+        revolute = self.__revolute[:,None]
+        Jv = np.where(revolute,np.cross(zi,o[...,-1:,:] - oi),zi)
+        Jw = np.where(revolute,zi,0)
+        J = np.concatenate((Jv,Jw),axis=-1)*self.__q_scale[:,None]
+        return np.swapaxes(J,-1,-2)
+
+    def jacobian(self,q=None,representation=None):
+        """geometric Jacobian (6 x dof) of the end of the chain relative to
+        the world, for joint variables q (default self.q), which can be an
+        array of N configurations (N x dof), then the Jacobians are N x6x dof.
+        The Jacobian maps the joint velocities (in the unit of the chain, so
+        deg/s for revolute joints if unit='deg') to the linear and angular
+        velocity [v; w] (w in rad/s). If representation is 'zyz' (Euler
+        angles) or 'rpy' (roll, pitch, yaw), the analytic Jacobian is
+        returned, which maps the joint velocities to [v; d(angles)/dt], see
+        orientation(), it is not defined (nan or inf) at the singularities
+        of the representation
+        Example:
+        >>> R = ur5()
+        >>> R.jacobian([30,30,30,30,30,30])        # 6x6
+        >>> Q = np.random.uniform(-180,180,(100000,6))
+        >>> R.jacobian(Q,representation='rpy')     # 100000x6x6
+        """
+        if q is None or np.ndim(q) == 1:
+            return self.__jacobian(*self._pose_axes(q),representation=representation)
+        q = np.asarray(q,dtype=float)
+        Q = q.reshape((-1,len(self)))
+        J = np.empty((len(Q),6,len(self)))
+        for k in range(0,len(Q),_block):
+            J[k:k+_block] = self.__jacobian(*self._pose_axes(Q[k:k+_block]),representation=representation)
+        return J.reshape(q.shape[:-1]+(6,len(self)))
+
+    def __jacobian(self,H,z,o,representation=None):
+        """geometric or analytic Jacobians from the poses H of the end of the
+        chain and the z-axes and origins of the frames (see _pose_axes())"""
+        J = self._jacobian(z,o)
+        if representation is not None:
+            angles, B_inv = _orientation(H[...,0:3,0:3],representation)
+            J[...,3:6,:] = np.matmul(B_inv,J[...,3:6,:])
+        return J
+
+    def _derivatives(self,q,params):
+        """forward mode automatic differentiation of the column recursion
+        of _columns(), every column x, y, z, p (...x3) carries its tangents
+        dx, dy, dz, dp (... x P x3) with respect to the P parameters, which
+        are updated with the derivatives of the elementary operations"""
+        n = len(self)
+        a, alpha, d, theta = self._params(q)
+        ct, st = np.cos(theta)[...,None], np.sin(theta)[...,None]
+        ca, sa = np.cos(alpha), np.sin(alpha)
+        shape = theta.shape[:-1]
+        x, y, z, p = [np.broadcast_to(self.__base[0:3,j],shape+(3,)) for j in range(4)]
+        dx, dy, dz, dp = [np.zeros(shape+(5*n if params else n,3)) for j in range(4)]
+        for i in range(n):
+            c, s = ct[...,i,:], st[...,i,:]
+            # Rot_z(theta), with d/dtheta (c x + s y) = y_new, d/dtheta (c y - s x) = -x_new
+            x, y = c*x + s*y, c*y - s*x
+            c, s = c[...,None,:], s[...,None,:]
+            dx, dy = c*dx + s*dy, c*dy - s*dx
+            if self.__revolute[i]:
+                dx[...,i,:] += self.__q_scale[i]*y
+                dy[...,i,:] -= self.__q_scale[i]*x
+            if params:
+                dx[...,4*n+i,:] += self.__to_rad*y
+                dy[...,4*n+i,:] -= self.__to_rad*x
+            # Trans_z(d) Trans_x(a)
+            p = p + a[i]*x + d[...,i,None]*z
+            dp = dp + a[i]*dx + d[...,i,None,None]*dz
+            if not self.__revolute[i]:
+                dp[...,i,:] += z
+            if params:
+                dp[...,n+i,:] += x
+                dp[...,3*n+i,:] += z
+            # Rot_x(alpha)
+            y, z = ca[i]*y + sa[i]*z, ca[i]*z - sa[i]*y
+            dy, dz = ca[i]*dy + sa[i]*dz, ca[i]*dz - sa[i]*dy
+            if params:
+                dy[...,2*n+i,:] += self.__to_rad*z
+                dz[...,2*n+i,:] -= self.__to_rad*y
+        H = np.zeros(shape+(4,4))
+        dH = np.zeros(dx.shape[:-1]+(4,4))
+        for j,(v,dv) in enumerate(((x,dx),(y,dy),(z,dz),(p,dp))):
+            H[...,0:3,j] = v
+            dH[...,0:3,j] = dv
+        H[...,3,3] = 1
+        return H, dH
+
+    def fk_derivatives(self,q=None,params=False):
+        """forward kinematics with exact derivatives, by forward mode
+        automatic differentiation in one pass, returns the pose H (4x4) of
+        the end of the chain and the derivatives dH (P x4x4), dH[k] is the
+        derivative of H with respect to parameter k, which are the joint
+        variables q (P = dof), or, if params is True, q, a, alpha, d and
+        theta (P = 5 dof, in this order, e.g. for calibration). Angles are in
+        the unit of the chain. q (default self.q) can be an array of N
+        configurations (N x dof), then H is N x4x4 and dH is N x P x4x4
+        Example:
+        >>> R = ur5()
+        >>> H, dH = R.fk_derivatives([30,30,30,30,30,30],params=True)
+        >>> dH[6+1]       # derivative with respect to a of link 2
+        """
+        if q is None:
+            q = self.__q
+        q = np.asarray(q,dtype=float)
+        if q.ndim == 1:
+            return self._derivatives(q,params)
+        Q = q.reshape((-1,len(self)))
+        P = 5*len(self) if params else len(self)
+        H = np.empty((len(Q),4,4))
+        dH = np.empty((len(Q),P,4,4))
+        for k in range(0,len(Q),_block):
+            H[k:k+_block], dH[k:k+_block] = self._derivatives(Q[k:k+_block],params)
+        return H.reshape(q.shape[:-1]+(4,4)), dH.reshape(q.shape[:-1]+(P,4,4))
+
+
+def _orientation(R,representation):
+    """angles (...x3) of rotation matrices R (...x3x3) in the representation
+    'zyz' (Euler angles phi, theta, psi: R = Rot_z(phi) Rot_y(theta)
+    Rot_z(psi)) or 'rpy' (roll psi, pitch theta, yaw phi: R = Rot_z(phi)
+    Rot_y(theta) Rot_x(psi)), and the matrices B^-1 (...x3x3) that map the
+    angular velocity w to the time derivatives of the angles"""
+    if representation == 'zyz':
+        theta = np.arctan2(np.sqrt(R[...,0,2]**2 + R[...,1,2]**2),R[...,2,2])
+        phi = np.arctan2(R[...,1,2],R[...,0,2])
+        psi = np.arctan2(R[...,2,1],-R[...,2,0])
+        angles = np.stack((phi,theta,psi),axis=-1)
+        cf, sf = np.cos(phi), np.sin(phi)
+        ct, st = np.cos(theta), np.sin(theta)
+        with np.errstate(divide='ignore',invalid='ignore'):
+            B_inv = np.stack((np.stack((-cf*ct/st,-sf*ct/st,np.ones_like(st)),axis=-1),
+                              np.stack((-sf,cf,np.zeros_like(st)),axis=-1),
+                              np.stack((cf/st,sf/st,np.zeros_like(st)),axis=-1)),axis=-2)
+    elif representation == 'rpy':
+        phi = np.arctan2(R[...,1,0],R[...,0,0])
+        theta = np.arctan2(-R[...,2,0],np.sqrt(R[...,2,1]**2 + R[...,2,2]**2))
+        psi = np.arctan2(R[...,2,1],R[...,2,2])
+        angles = np.stack((psi,theta,phi),axis=-1)
+        cf, sf = np.cos(phi), np.sin(phi)
+        ct, st = np.cos(theta), np.sin(theta)
+        with np.errstate(divide='ignore',invalid='ignore'):
+            B_inv = np.stack((np.stack((cf/ct,sf/ct,np.zeros_like(ct)),axis=-1),
+                              np.stack((-sf,cf,np.zeros_like(ct)),axis=-1),
+                              np.stack((cf*st/ct,sf*st/ct,np.ones_like(ct)),axis=-1)),axis=-2)
+    else:
+        raise ValueError("(orientation): representation should be 'zyz' or 'rpy'.")
+    return angles, B_inv
+
+def orientation(R,representation='rpy'):
+    """angles (...x3, in rad) of rotation matrices R (...x3x3), or of a so3,
+    se3, so3_array or se3_array object, in the representation 'zyz' (Euler
+    angles [phi, theta, psi], R = Rot_z(phi) Rot_y(theta) Rot_z(psi)) or
+    'rpy' ([roll, pitch, yaw], R = Rot_z(yaw) Rot_y(pitch) Rot_x(roll)),
+    the representation of the analytic Jacobian, see chain.jacobian()"""
+    if isinstance(R,(so3,se3,so3_array,se3_array)):
+        R = R.rot
+    return _orientation(np.asarray(R,dtype=float),representation)[0]
+
+
+def ur5(q=None,unit='deg'):
+    """chain of the Universal Robot UR5, with the Denavit-Hartenberg
+    parameters of ur5.py (a and d in meters)"""
+    to_unit = 1. if unit == 'deg' else np.pi/180
+    return chain(a=[0,-0.42500,-0.39225,0,0,0],
+                 alpha=np.array([90,0,0,90,90,0])*to_unit,
+                 d=[0.089159,0,0,0.10915,0.09465,0.0823],
+                 theta=np.array([0,-90,0,-90,0,0])*to_unit,
+                 joint='rrrrrr',q=q,unit=unit)
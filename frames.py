@@ -1,10 +1,14 @@
 # This module frames.py provides a number of python classess
 # for visualization of rotations and homogeneous 
 # transformations
+# The product of a frame with so3 or se3 objects (e.g. F0*R01*R12) is a
+# frame_product, of which the visual objects are only created when it is used
+# (e.g. when its label is set), so intermediate products are never shown
 # 
 # Dependencies:
 # numpy:              for matrices, vectors and linear algebra
 # transformations.py: to calculate rotation and homogenous transformations
+# groups.py:          so3 and se3 classes (rotations and homogeneous transf.)
 # visual:             for 3D visualization
 
 # Author:    Rufus Fraanje, p.r.fraanje@hhs.nl
@@ -24,309 +28,20 @@ else:
     from color_palette_dark import *
 
 import numpy as np             # numpy for matrix/vector calc.: http://numpy.scipy.org
-import transformations as tf   # for all kind of rotations etc.: http://www.lfd.uci.edu/~gohlke/code/transformations.py.html
+import weakref
 
-# some old versions of numpy don't have the method isclose
-# therefore, use the function below:
-def isclose(a,b):
-    if "isclose" in dir(np):
-        return np.isclose(a,b)
-    else:
-        return abs(a-b)<1e-6 
-
-
-# definition of Special Orthogonal Group SE(3) of 
-# (right handed) rotation matrices
-# for more about classes in python: https://docs.python.org/2/tutorial/classes.html
-# also see: http://anandology.com/python-practice-book/object_oriented_programming.html
-class so3(object):
-    def __init__(self,angle=0,axis=[0,0,1],unit='deg'):
-        """initialization of object, rotation with angle around the vector axis,
-           angle is specified in degrees (default) or radians (unit='rad')"""
-        if unit == 'deg': angle = angle*np.pi/180
-        # otherwise, angle is assumed to be in radians
-        self.__rot = tf.rotation_matrix(angle,axis)[0:3,0:3]
-
-# properties are excellent for quickly getting or setting values
-# see more on this: https://docs.python.org/2/library/functions.html?highlight=property#property
-    @property
-    def rot(self):
-        """return or set the rotation matrix, a 3x3 numpy array
-        Example:
-        >>> R1 = so3(np.pi/4,axis=[1,0,0],unit='rad') 
-        >>> R2 = so3(60,axis=[1,0,0])           # by default unit is in degrees 
-        >>> R1.rot
-        >>> R2.rot
-        >>> R1.rot = np.eye(3)                  # set rotation to identity
-        >>> R2.rot = [[1,0,0],[0,1,0],[0,0,1]]  # set rotation to identity
-        >>> R2.rot = [1,0,0,0,1,0,0,0,1]        # set rotation to identity
-        """
-        return self.__rot
-    @rot.setter                                 # setter allows to set property
-    def rot(self,R):
-        R = np.array(R).reshape(3,3)
-        if is_so3(R):
-            self.__rot = R
-        else:
-            raise ValueError("(class {0.__class__.__name__}, rot): R is not in so3 (not symmetric and/or det(R)=1)".format(self))
-
-    @property
-    def T(self):
-        """returns a new so3 object with transposed (i.e. inverse) rotation matrix"""
-        ret = so3()
-        ret.rot = self.rot.T
-        return ret
-
-# inverse of rotation matrix is equal to transpose, so does not need to be implemented
-#    @property
-#    def inv(self):
-#        ret = so3()
-#        ret.rot = np.linalg.inv(self.rot)
-#        return ret
-
-# calculation of determinant (in fact not necessary as well, because should be 1 always)
-    @property
-    def det(self):
-        """returns the determinant of the rotation matrix (should be 1)"""
-        return np.linalg.det(self.rot)
-
-# the __repr__ method of a class defines how objects are shown in python, e.g. 
-# >>> a = 2
-# >>> a  # __repr__ functions of variable a is called, is same as:
-# >>> print(a.__repr__()) # print the output string of the repr function of a
-    def __repr__(self):
-        """repr function, defines how object is shown in python interpreter"""
-        string = "{0.__class__.__name__}: (rotation matrix)\n\n".format(self)
-        string += "rot:\n"
-        string += self.rot.__repr__()
-        return string
-
-# definition of the multiplication operator '*', in python one can define arithmatic
-# operators, like '-', '+', '*', '/', etc. use with objects
-# see e.g.: https://docs.python.org/2/reference/datamodel.html?highlight=init__#object.__mul__
-    def __mul__(self,other):
-        """multiplication of two so3 objects or a so3 object and a frame or
-        point
-        Example:
-        >>> Rz  = so3(angle=30)   
-        >>> Ry  = so3(angle=60,axis=[0,1,0])
-        >>> Rzy = Rz*Ry           # new object, equivalent to Rzy = Rz * Ry
-        >>> F0 = frame(label='0') # build frame 0 with default settings
-        >>> F1 = Ry*Rz*F0         # rotation of F0 (note: premultiplication is
-                                  # rotation about fixed axes
-        >>> F2.label = '1'        # always set label, because this is not being done
-                                  # automatically 
-        >>> F2 = F0*Rz*Ry         # is possible as well, see documentation
-                                  # under __rmul__()
-        >>> F2.label = '2'        # always set label, because this is not being done
-                                  # automatically 
-        """
-        if isinstance(other,so3):
-            rot = np.dot(self.rot,other.rot)
-            ret = so3()
-            ret.rot = rot
-            return ret
-        elif isinstance(other,frame) | isinstance(other,point):
-           if other.label == "__replace_label__": # if label is this, then it's result of
-                                       # earlier multiplication and should be made invisible
-                other.visible = False  # this is to suppress visualization of intermediate frames
-                                       # in e.g. F0 * R01 * R12, etc. 
-           frame_new = frame(label="__replace_label__")
-           frame_new.pos = [0,0,0]
-           frame_new.rot = np.dot(self.rot,other.rot)
-           return frame_new
-
-    def __rmul__(self,other):
-        """multiplication of two so3 objects or a so3 object and a frame or
-        point
-        Example:
-        >>> R01 = so3(angle=30)                # z-axis rotation
-        >>> R12 = so3(angle=30,axis=[1,0,0])   # x-axis rotation
-        >>> F0 = frame(label='0')
-        >>> F1 = F0*R01*R12 # first rotate about z-axis, then rotate new
-                            # intermediate frame (F0*R01) about x-axis of (F0*R01)
-        >>> F1.label = '1'  # always set label, because this is not being done
-                            # automatically 
-        """
-        if isinstance(other,so3):
-            rot = np.dot(other.rot,self.rot)
-            ret = so3()
-            ret.rot = rot
-            return ret
-        elif isinstance(other,frame) | isinstance(other,point):
-            #frame_copy = other.copy("_rot")
-            #frame_copy.frame_rel = other
-            #frame_copy.pos = [0,0,0]
-            #frame_copy.rot = self.rot
-            #return frame_copy
-            if other.label == "__replace_label__": # if label is this, then it's result of
-                                       # earlier multiplication and should be made invisible
-                other.visible = False  # this is to suppress visualization of intermediate frames
-                                       # in e.g. F0 * R01 * R12, etc. 
-            frame_new = frame(label="__replace_label__")
-            #frame_new = frame(label="_new")
-            frame_new.pos = [0,0,0]
-            frame_new.rot = np.dot(other.rot,self.rot)
-            return frame_new
-
-            
-
-# function to determine whether a matrix is a 3x3 right handed rotation matrix
-def is_so3(R,info=False):
-    """checks whether R is in so3, i.e., is a right handed rotation
-    >>> is_so3(np.eye(3))          # returns true
-    >>> is_so3(np.random.randn(3)) # generally returns False
-    info can be set to True to make the function more verbous
-    """
-    if isinstance(R,so3):
-        Rmat = R.rot
-    else:
-        Rmat = R
-    det = np.linalg.det(Rmat)
-    is_symmetric = np.allclose(np.dot(Rmat.T,Rmat),np.eye(3))
-    if not(isclose(det,1)):
-        if isclose(det,-1):
-            if info: print("det(R)=-1, rotations in so3 should be right handed.")
-            return False
-        else:
-            if info: print("det(R)={0} and not 1, so R is not a rotation matrix.".format(det))
-            return False
-    else:
-        if is_symmetric:
-            return True
-        else:
-            if info: print("R is not symmetric.")
-            return False
-
-# function to determine whether a matrix is a homogeneous transformation matrix:
-def is_se3(H,info=False):
-    """checks whether H is in se3, i.e., is a homogenous transformation,
-    in fact, checks whether H[0:3,0:3] is a rotation with is_so3(H[0:3,0:3])
-    and checks wether last row of H, i.e., H[3,:], equals [0,0,0,1]
-    >>> is_se3(np.eye(4))          # returns True
-    >>> is_se3(np.random.randn(3)) # generally returns False
-    info can be set to True to make the function more verbous
-    """
-    if isinstance(H,se3):
-        Hmat = H.hom
-    else:
-        Hmat = H
-    Hmat = np.array(Hmat).reshape((4,4))
-    check = True
-    check &= (Hmat[3,:]==np.array([0,0,0,1])).all()
-    if (not(check)) & info: print("Last row of H (H[3,:]) is not [0,0,0,1].")
-    check &= is_so3(Hmat[0:3,0:3],info=info)
-    return check
-
-
-# definition of Special Euclidian Group SE(3) of 
-# homogenous transformation matrices for rigid motions
-class se3(object):
-    def __init__(self,dis=[0,0,0],angle=0,axis=[0,0,1],unit='deg'):
-        """initialization of object, dis = displacement, angle is the angle of
-        rotation around the vector axis, unit is the unit of the angle."""
-        self.__dis = np.array(dis).reshape((3,1))
-        if unit == 'deg': angle = angle*np.pi/180.
-        # otherwise, angle is assumed to be in radians
-        self.__rot = tf.rotation_matrix(angle,axis)[0:3,0:3]
-
-        self.__hom     = np.vstack( (np.hstack((self.__rot,self.__dis)), np.array([0,0,0,1]))) 
-        self.__hom_inv = np.vstack( (np.hstack((self.__rot.T,-np.dot(self.__rot.T,self.__dis))), np.array([0,0,0,1]))) 
-
-    @property
-    def dis(self):
-        return self.__dis
-    @dis.setter
-    def dis(self,dis):
-        self.__dis = np.array(dis).reshape((3,1))
-        self.__hom[0:3,3] = self.__dis.reshape(3)
-        self.__hom_inv = np.vstack( (np.hstack((self.__rot.T,-np.dot(self.__rot.T,self.__dis))), np.array([0,0,0,1]))) 
-
-    @property
-    def rot(self):
-        return self.__rot
-    @rot.setter
-    def rot(self,R):
-        R = np.array(R).reshape((3,3))
-        if is_so3(R):
-            self.__rot = R
-            self.__hom[0:3,0:3] = R
-            self.__hom_inv = np.vstack( (np.hstack((self.__rot.T,-np.dot(self.__rot.T,self.__dis))), np.array([0,0,0,1]))) 
-        else:
-            raise ValueError("(class {0.__class__.__name__}, rot): R is not in so3 (not symmetric and/or det(R)=1)".format(self))
-
-    @property
-    def hom(self):
-        return self.__hom
-    @hom.setter
-    def hom(self,H):
-        H = np.array(H).reshape((4,4))
-        if is_se3(H):
-            self.__hom = H
-            self.__dis = H[0:3,3].reshape((3,1))
-            self.__rot = H[0:3,0:3]
-            self.__hom_inv = np.vstack( (np.hstack((self.__rot.T,-np.dot(self.__rot.T,self.__dis))), np.array([0,0,0,1]))) 
-        else:
-            raise ValueError("(class {0.__class__.__name__}, hom): H is not in se3.".format(self))
-
-    @property
-    def hom_inv(self):
-        return self.__hom_inv
-
-    @property
-    def T(self):
-        ret = se3()
-        ret.hom = self.hom.T
-        return ret
-
-    @property
-    def inv(self):
-        ret = se3()
-        ret.hom = self.__hom_inv 
-        return ret
-
-    @property
-    def det(self):
-        return np.linalg.det(self.hom)
-
-    def __repr__(self):
-        string = "{0.__class__.__name__}: (homogenous transf. matrix)\n\n".format(self)
-        string += "hom:\n"
-        string += self.hom.__repr__()
-        return string
-
-    def __mul__(self,other):
-        if isinstance(other,se3):
-            hom = np.dot(self.hom,other.hom)
-            ret = se3()
-            ret.hom = hom
-            return ret
-        elif isinstance(other,frame) | isinstance(other,point):
-            if other.label == "__replace_label__": # if label is this, then it's result of
-                                       # earlier multiplication and should be made invisible
-                other.visible = False  # this is to suppress visualization of intermediate frames
-                                       # in e.g. F0 * R01 * R12, etc. 
-            frame_new = frame(label="__replace_label__")
-            #frame_new = frame(label="_new")
-            frame_new.hom = np.dot(self.hom,other.hom)
-            return frame_new
-
-    def __rmul__(self,other):
-        if isinstance(other,se3):
-            hom = np.dot(other.hom,self.hom)
-            ret = se3()
-            ret.hom = hom
-            return ret
-        elif isinstance(other,frame) | isinstance(other,point):
-            if other.label == "__replace_label__": # if label is this, then it's result of
-                                       # earlier multiplication and should be made invisible
-                other.visible = False  # this is to suppress visualization of intermediate frames
-                                       # in e.g. F0 * R01 * R12, etc. 
-            frame_new = frame(label="__replace_label__")
-            frame_new.hom = np.dot(other.hom,self.hom)
-            return frame_new
+# so3, se3, is_so3 and is_se3 are defined in groups.py, which does not depend
+# on visual and can be imported on its own for kinematics without a display
+import groups                 # for groups.orthonormalize_every
+from groups import *
 
+# counts the changes in the hierarchy of frames (i.e. frame_rel), frame_tree
+# uses this to know when it has to rebuild its levels
+_hierarchy_version = 0
 
+# point, label and axes of released frames (see frame.release()), that are
+# reused by frames that are created later
+_visual_pool = []
 
 class axes(object):
     def __init__(self,frame_obj,visible=True,visible_label=True,scale=1.0):
@@ -379,6 +94,15 @@ class axes(object):
         self.__z_axis_obj.headwidth  = hw
         self.__z_axis_obj.headlength = hl
 
+    @property
+    def frame_obj(self):
+        return self.__frame_obj
+    @frame_obj.setter
+    def frame_obj(self,frame_obj):
+        """moves the axes to another visual.frame"""
+        self.__frame_obj = frame_obj
+        self.__frame_axis_obj.frame = frame_obj
+
     @property
     def visible(self):
         return self.__frame_axis_obj.visible
@@ -400,6 +124,8 @@ class frame(object):
     def __init__(self,dis=np.zeros((3,1)),rot=np.eye(3),label="",frame_rel=None,color=visual.color.text,
                  visible=True,visible_frame=True,visible_label=True,visible_frame_label=True,scale=1.0):
 
+       if isinstance(frame_rel,frame_product):
+           frame_rel = frame_rel.materialize()
        self.__dis = np.array(dis).reshape(3,1)
        self.__rot = np.array(rot).reshape(3,3)
        self.__hom = np.vstack((np.hstack((self.__rot,self.__dis)),np.array([0,0,0,1])))
@@ -407,19 +133,53 @@ class frame(object):
        self.__label = label
        self.__color = color
 
+       # the pose relative to the world is cached, and is only recalculated
+       # after this frame or one of the frames it is defined relative to has
+       # been changed, see _invalidate()
+       self.__hom_world = None
+       self.__hom_world_inv = None
+       self.__children = weakref.WeakSet() # frames defined relative to this frame
+       global _hierarchy_version
+
        if frame_rel == None:
            self.__frame_rel = None
            self.__frame_obj = visual.frame(pos=self.__dis,visible=visible)
        else:
            self.__frame_rel = frame_rel
+           self.__frame_rel.__children.add(self)
+           _hierarchy_version += 1
            self.__frame_obj = visual.frame(frame=self.__frame_rel.__frame_obj,pos=self.__dis,visible=visible)
+       if len(_visual_pool) > 0:
+           # reuse the point, label and axes of a released frame, they are
+           # moved into the new frame_obj (the frame_obj of the released
+           # frame is not reused, because other visual objects, e.g. of a
+           # point_cloud or a link, can be in it)
+           self.__point_obj,self.__label_obj,self.axis = _visual_pool.pop()
+           self.__point_obj.frame = self.__frame_obj
+           self.__point_obj.color = color
+           self.__label_obj.frame = self.__frame_obj
+           self.__label_obj.text = self.__label
+           self.__label_obj.visible = visible_label
+           self.__label_obj.color = color
+           self.__scale_label(scale)
+           self.axis.frame_obj = self.__frame_obj
+           self.axis.scale = scale
+           self.axis.visible = visible_frame
+           self.axis.visible_label = visible_frame_label
+       else:
+           self.__point_obj = visual.points(frame=self.__frame_obj,pos=(0,0,0),color=color,size=4,size_units="pixels",shape="round")
+           self.__label_obj = visual.label(frame=self.__frame_obj,text=self.__label,visible=visible_label,
+                   pos=(0,0,0),xoffset=5*scale,yoffset=1*scale,space=5*scale,line=0,height=16*scale,border=0,font='sans',color=color,box=False,opacity=0)
+           self.axis = axes(frame_obj=self.__frame_obj,visible=visible_frame,visible_label=visible_frame_label,scale=scale)
 
        self.__frame_obj.axis = self.__rot[:,0]
        self.__frame_obj.up = self.__rot[:,1]
-       self.__point_obj = visual.points(frame=self.__frame_obj,pos=(0,0,0),color=color,size=4,size_units="pixels",shape="round")
-       self.__label_obj = visual.label(frame=self.__frame_obj,text=self.__label,visible=visible_label,
-               pos=(0,0,0),xoffset=5*scale,yoffset=1*scale,space=5*scale,line=0,height=16*scale,border=0,font='sans',color=color,box=False,opacity=0)
-       self.axis = axes(frame_obj=self.__frame_obj,visible=visible_frame,visible_label=visible_frame_label,scale=scale)
+
+    def __scale_label(self,scale):
+        self.__label_obj.xoffset = 5*scale
+        self.__label_obj.yoffset = 1*scale
+        self.__label_obj.space   = 5*scale
+        self.__label_obj.height  = 16*scale
 
     def __repr__(self):
         string =  "{0.__class__.__name__}: label = {0.label}, ".format(self)
@@ -454,11 +214,18 @@ class frame(object):
         self.__label = label
         self.__label_obj.text = self.__label
 
+    @property
+    def children(self):
+        """list of the frames that are defined relative to this frame"""
+        return list(self.__children)
+
     @property
     def frame_rel(self):
         return self.__frame_rel
     @frame_rel.setter
     def frame_rel(self,frame_rel,*args):
+        if isinstance(frame_rel,frame_product):
+            frame_rel = frame_rel.materialize()
         if len(args)==1:
             scale = args[0]
         else:
@@ -467,29 +234,37 @@ class frame(object):
             else:
                 scale = frame_rel.axis.scale
 
-        visible = self.visible
-        visible_label = self.visible_label
-        visible_frame = self.axis.visible
-        visible_frame_label = self.axis.visible_label
-        color = self.color
-        self.visible = False
-        del self.__frame_rel
-        del self.__frame_obj
+        # the visual objects (frame_obj, with point, label and axes in it)
+        # are moved to the new frame, instead of creating new ones
+        if self.__frame_rel != None:
+            self.__frame_rel.__children.discard(self)
         if frame_rel == None:
             self.__frame_rel = None
-            self.__frame_obj = visual.frame(dis=self.__dis,visible=visible)
+            self.__frame_obj.frame = None
         else:
             self.__frame_rel = frame_rel
-            self.__frame_obj = visual.frame(frame=self.__frame_rel.__frame_obj,pos=self.__dis,visible=visible)
-
-
-        self.__frame_obj.axis = self.__rot[:,0]
-        self.__frame_obj.up = self.__rot[:,1]
-        self.__point_obj = visual.points(frame=self.__frame_obj,pos=(0,0,0),color=color,size=4,size_units="pixels",shape="round")
-        self.__label_obj = visual.label(frame=self.__frame_obj,text=self.__label,visible=visible_label,
-                pos=(0,0,0),xoffset=5*scale,yoffset=1*scale,space=5*scale,line=0,height=16*scale,border=0,font='sans',color=color,box=False,opacity=0)
-        self.axis = axes(frame_obj=self.__frame_obj,visible=visible_frame,visible_label=visible_frame_label,scale=scale)
-
+            self.__frame_rel.__children.add(self)
+            self.__frame_obj.frame = self.__frame_rel.__frame_obj
+        self.__scale_label(scale)
+        self.axis.scale = scale
+        global _hierarchy_version
+        _hierarchy_version += 1
+        self._invalidate()
+
+    def release(self):
+        """removes the frame, and all frames defined relative to it, from the
+        scene. The point, label and axes are kept to be reused by frames that
+        are created later, so the frame should not be used anymore afterwards"""
+        for child in self.children:
+            child.release()
+        if self.__frame_rel != None:
+            self.__frame_rel.__children.discard(self)
+            self.__frame_rel = None
+            global _hierarchy_version
+            _hierarchy_version += 1
+        self._invalidate()
+        self.__frame_obj.visible = False
+        _visual_pool.append((self.__point_obj,self.__label_obj,self.axis))
 
     @property
     def dis(self):
@@ -502,6 +277,7 @@ class frame(object):
         self.__hom[0:3,3] = self.__dis.reshape(3)
         self.__hom_inv[0:3,3] = -np.dot(self.__rot.T,self.__dis).reshape(3) # only this part changes
         self.__frame_obj.pos = self.__dis
+        self._invalidate()
 
     @property
     def rot(self):
@@ -514,6 +290,7 @@ class frame(object):
         self.__hom_inv[0:3,:] = np.hstack((self.__rot.T,-np.dot(self.__rot.T,self.__dis)))
         self.__frame_obj.axis = self.__rot[:,0]
         self.__frame_obj.up   = self.__rot[:,1]
+        self._invalidate()
 
     @property
     def hom(self):
@@ -555,47 +332,121 @@ class frame(object):
     def visible_label(self,val):
         self.__label_obj.visible = val
 
+    def _invalidate(self):
+        """marks the cached pose relative to the world of this frame and of
+        all frames defined relative to it as out of date"""
+        if self.__hom_world is None:
+            return # frames defined relative to this frame are out of date already
+        self.__hom_world = None
+        self.__hom_world_inv = None
+        for child in list(self.__children):
+            child._invalidate()
+
+    def _world(self):
+        """returns the (cached) homogeneous transformation relative to the world"""
+        if self.__hom_world is None:
+            if self.__frame_rel == None:
+                self.__hom_world = self.__hom.copy()
+            else:
+                self.__hom_world = np.dot(self.__frame_rel._world(),self.__hom)
+        return self.__hom_world
+
+    def _set_world(self,hom_world):
+        """sets the cached pose relative to the world, see frame_tree.update()"""
+        self.__hom_world = hom_world
+        self.__hom_world_inv = None
+
+    def _world_inv(self):
+        """returns the (cached) inverse of _world()"""
+        if self.__hom_world_inv is None:
+            H = self._world()
+            Rt = H[0:3,0:3].T
+            self.__hom_world_inv = np.vstack((np.hstack((Rt,-np.dot(Rt,H[0:3,3:4]))),np.array([0,0,0,1])))
+        return self.__hom_world_inv
+
     def dis_world(self,dis=[0,0,0]):
         dis = np.array(dis).reshape((3,1))
-        if self.__frame_rel == None:
-            return self.dis + np.dot(self.rot,dis)
-        else:
-            return self.__frame_rel.dis_world(self.dis+np.dot(self.rot,dis))
+        H = self._world()
+        return H[0:3,3:4] + np.dot(H[0:3,0:3],dis)
 
     def rot_world(self,rot=np.eye(3)):
         rot = np.array(rot).reshape((3,3))
-        if self.__frame_rel == None:
-            return np.dot(self.rot,rot)
-        else:
-            return self.__frame_rel.rot_world(np.dot(self.rot,rot))
+        return np.dot(self._world()[0:3,0:3],rot)
 
     def hom_world(self,hom=np.eye(4)):
         hom = np.array(hom).reshape((4,4))
-        if self.__frame_rel == None:
-            return np.dot(self.hom,hom) 
-        else:
-            return self.__frame_rel.hom_world(np.dot(self.hom,hom))
+        return np.dot(self._world(),hom)
 
     def dis_local(self,dis=[0,0,0]):
         dis = np.array(dis).reshape((3,1))
-        if self.__frame_rel == None:
-            return np.dot(self.rot.T,dis - self.dis)
-        else:
-            return np.dot(self.rot.T,self.__frame_rel.dis_local(dis)-self.dis)
+        H_inv = self._world_inv()
+        return H_inv[0:3,3:4] + np.dot(H_inv[0:3,0:3],dis)
 
     def rot_local(self,rot=np.eye(3)):
         rot = np.array(rot).reshape((3,3))
-        if self.__frame_rel == None:
-            return np.dot(self.rot.T,rot)
-        else:
-            return np.dot(self.rot.T,self.__frame_rel.rot_local(rot))
+        return np.dot(self._world_inv()[0:3,0:3],rot)
 
     def hom_local(self,hom=np.eye(4)):
         hom = np.array(hom).reshape((4,4))
-        if self.__frame_rel == None:
-            return np.dot(self.hom_inv,hom)
-        else:
-            return np.dot(self.hom_inv,self.__frame_rel.hom_local(hom))
+        return np.dot(self._world_inv(),hom)
+
+    def points_world(self,points):
+        """coordinates relative to the world of points (Nx3) given relative to
+        this frame, all converted with one multiplication
+        Example:
+        >>> F1.points_world(np.random.rand(1000,3))    # 1000x3
+        """
+        points = np.array(points,dtype=float).reshape((-1,3))
+        H = self._world()
+        return np.dot(points,H[0:3,0:3].T) + H[0:3,3]
+
+    def points_local(self,points):
+        """coordinates relative to this frame of points (Nx3) given relative
+        to the world, the inverse of points_world()"""
+        points = np.array(points,dtype=float).reshape((-1,3))
+        H_inv = self._world_inv()
+        return np.dot(points,H_inv[0:3,0:3].T) + H_inv[0:3,3]
+
+    def points_to(self,points,frame_to=None):
+        """coordinates relative to frame frame_to (the world if None) of
+        points (Nx3) given relative to this frame, the transformation from
+        this frame to frame_to is calculated once for all points
+        Example:
+        >>> F2.points_to(waypoints,F1)   # waypoints in F2 to coordinates in F1
+        """
+        if frame_to == None:
+            return self.points_world(points)
+        points = np.array(points,dtype=float).reshape((-1,3))
+        H = np.dot(frame_to._world_inv(),self._world())
+        return np.dot(points,H[0:3,0:3].T) + H[0:3,3]
+
+    def __mul__(self,other):
+        """multiplication of a frame (or point) with a so3 or se3 object,
+        returns a new frame
+        Example:
+        >>> R01 = so3(angle=30)                # z-axis rotation
+        >>> R12 = so3(angle=30,axis=[1,0,0])   # x-axis rotation
+        >>> F0 = frame(label='0')
+        >>> F1 = F0*R01*R12 # first rotate about z-axis, then rotate new
+                            # intermediate frame (F0*R01) about x-axis of (F0*R01)
+        >>> F1.label = '1'  # always set label, F1 is shown from now on
+        the result is a frame_product, which is only shown once it is used,
+        so no intermediate frames are shown
+        """
+        return _product(self,other,False)
+
+    def __rmul__(self,other):
+        """multiplication of a so3 or se3 object with a frame (or point),
+        returns a new frame (a frame_product, see __mul__)
+        Example:
+        >>> Rz  = so3(angle=30)
+        >>> Ry  = so3(angle=60,axis=[0,1,0])
+        >>> F0 = frame(label='0') # build frame 0 with default settings
+        >>> F1 = Ry*Rz*F0         # rotation of F0 (note: premultiplication is
+                                  # rotation about fixed axes
+        >>> F1.label = '1'        # always set label, F1 is shown from now on
+        """
+        return _product(self,other,True)
 
     def mul(self,obj):
         """left multiplication of self.rot or self.hom with obj,
@@ -624,6 +475,115 @@ class frame(object):
         else:
             error = True
         if error: raise TypeError("({0.__class__.__name__}, mul), obj is of wrong type.".format(self))
+        # orthonormalize after groups.orthonormalize_every multiplications,
+        # against numerical drift when a frame is moved in many small steps
+        self._ncomp = getattr(self,'_ncomp',0) + 1
+        if groups.orthonormalize_every and self._ncomp >= groups.orthonormalize_every:
+            self.rot = orthonormalize(self.rot)
+            self._ncomp = 0
+
+class frame_product(frame):
+    """result of a multiplication of a frame with so3 or se3 objects, e.g.
+    F0*R01*R12, defined in world coordinates. Only the homogeneous
+    transformation matrix is calculated, the visual objects of the frame
+    (point, label and axes) are created when it is used for the first time,
+    e.g. when its label, frame_rel or visible is set or read, or when it is
+    used as frame_rel of another frame. The pose (dis, rot, hom, hom_world()
+    etc.) and multiplication do not create them, so for F0*R01*R12 only one
+    frame is shown, and only if it is used.
+    Example:
+    >>> F0 = frame(label='0')
+    >>> F1 = F0*so3(angle=30)*so3(angle=30,axis=[1,0,0])  # frame_product
+    >>> F1.hom_world()                                    # not shown yet
+    >>> F1.label = '1'                                    # shown now
+    """
+    def __init__(self,hom):
+        # frame.__init__ is called by materialize()
+        object.__setattr__(self,'_frame_product__hom',hom)
+
+    def materialize(self):
+        """creates the visual objects of the frame if this has not been done
+        yet, and returns the frame (self)"""
+        hom = self.__dict__.pop('_frame_product__hom',None)
+        if hom is not None:
+            frame.__init__(self,dis=hom[0:3,3],rot=hom[0:3,0:3])
+        return self
+
+    @property
+    def _lazy(self):
+        return '_frame_product__hom' in self.__dict__
+
+    def __getattr__(self,name):
+        # only called for attributes that are not set (yet), the attributes
+        # of frame (the private ones and axis) are set by materialize()
+        if (name.startswith('_frame__') or name == 'axis') and self._lazy:
+            return getattr(self.materialize(),name)
+        raise AttributeError("'{0}' object has no attribute '{1}'".format(self.__class__.__name__,name))
+
+    def __setattr__(self,name,val):
+        self.materialize()
+        object.__setattr__(self,name,val)
+
+    def __repr__(self):
+        if self._lazy:
+            return "{0.__class__.__name__}: not shown yet, defined in world coordinates\n\nhom: \n{1!r}".format(self,self.__hom)
+        return frame.__repr__(self)
+
+    @property
+    def dis(self):
+        if self._lazy:
+            return self.__hom[0:3,3:4]
+        return frame.dis.fget(self)
+    @dis.setter
+    def dis(self,dis):
+        frame.dis.fset(self,dis)
+
+    @property
+    def rot(self):
+        if self._lazy:
+            return self.__hom[0:3,0:3]
+        return frame.rot.fget(self)
+    @rot.setter
+    def rot(self,rot):
+        frame.rot.fset(self,rot)
+
+    @property
+    def hom(self):
+        if self._lazy:
+            return self.__hom
+        return frame.hom.fget(self)
+    @hom.setter
+    def hom(self,hom):
+        frame.hom.fset(self,hom)
+
+    @property
+    def hom_inv(self):
+        if self._lazy:
+            Rt = self.__hom[0:3,0:3].T
+            return np.vstack((np.hstack((Rt,-np.dot(Rt,self.__hom[0:3,3:4]))),np.array([0,0,0,1])))
+        return frame.hom_inv.fget(self)
+
+    def _world(self):
+        if self._lazy:
+            return self.__hom      # a product is defined in world coordinates
+        return frame._world(self)
+
+    def _world_inv(self):
+        if self._lazy:
+            return self.hom_inv
+        return frame._world_inv(self)
+
+def _product(frame_obj,other,pre):
+    """returns the frame_product of frame frame_obj and so3 or se3 object
+    other, pre is True for other*frame_obj"""
+    if isinstance(other,so3):
+        hom = np.eye(4)   # the displacement of a rotated frame is zero
+        hom[0:3,0:3] = np.dot(other.rot,frame_obj.rot) if pre else np.dot(frame_obj.rot,other.rot)
+    elif isinstance(other,se3):
+        hom = np.dot(other.hom,frame_obj.hom) if pre else np.dot(frame_obj.hom,other.hom)
+    else:
+        return NotImplemented
+    return frame_product(hom)
 
 class point(frame):
     def __init__(self,frame=None,dis=[0,0,0],label=''):
@@ -640,7 +600,174 @@ class point(frame):
         string += "visible      : {0.visible},\t visible_label      : {0.visible_label}\n".format(self)
         string += "axis.visible : {0.axis.visible},\t axis.visible_label : {0.axis.visible_label}".format(self)
         return string
- 
+
+# many points (e.g. a sensor scan), as one Nx3 array of coordinates relative
+# to a frame, shown with one visual.points object, unlike the class point,
+# which creates a frame with label and axes for every point
+class point_cloud(object):
+    def __init__(self,points=np.zeros((0,3)),frame=None,color=visual.color.text,size=2,visible=True):
+        """initialization of object, points (Nx3) are the coordinates relative
+        to frame (or to the world if frame is None)
+        Example:
+        >>> F0 = frame(label='0')
+        >>> F1 = frame(dis=[1,0,0],label='1',frame_rel=F0)
+        >>> scan = point_cloud(np.random.rand(100000,3),frame=F1)
+        >>> F1.rot = so3(30).rot         # moves the scan with F1
+        >>> scan.points_world()          # 100000x3, with one multiplication
+        """
+        self.__points = np.array(points,dtype=float).reshape((-1,3))
+        self.__frame = frame
+        if frame == None:
+            frame_obj = None
+        else:
+            frame_obj = frame.frame_obj
+        self.__points_obj = visual.points(frame=frame_obj,pos=self.__points,color=color,size=size,
+                                          size_units="pixels",shape="round",visible=visible)
+
+    def __repr__(self):
+        string =  "{0.__class__.__name__}: {1} points, ".format(self,len(self))
+        if self.__frame == None:
+            string += "defined in world coordinates\n\n"
+        else:
+            string += "defined relative to frame: {0}\n\n".format(self.__frame.label)
+        string += "points: \n" + self.__points.__repr__()
+        return string
+
+    def __len__(self):
+        return self.__points.shape[0]
+
+    @property
+    def points_obj(self):
+        return self.__points_obj
+
+    @property
+    def points(self):
+        """coordinates of the points (Nx3) relative to frame"""
+        return self.__points
+    @points.setter
+    def points(self,points):
+        self.__points = np.array(points,dtype=float).reshape((-1,3))
+        self.__points_obj.pos = self.__points
+
+    @property
+    def frame(self):
+        return self.__frame
+    @frame.setter
+    def frame(self,frame):
+        """attaches the points to another frame (the coordinates relative to
+        the frame are kept, so the points move with it)"""
+        self.__frame = frame
+        if frame == None:
+            self.__points_obj.frame = None
+        else:
+            self.__points_obj.frame = frame.frame_obj
+
+    @property
+    def color(self):
+        return self.__points_obj.color
+    @color.setter
+    def color(self,val):
+        self.__points_obj.color = val
+
+    @property
+    def visible(self):
+        return self.__points_obj.visible
+    @visible.setter
+    def visible(self,val):
+        self.__points_obj.visible = val
+
+    def points_world(self):
+        """coordinates of the points (Nx3) relative to the world"""
+        if self.__frame == None:
+            return self.__points.copy()
+        return self.__frame.points_world(self.__points)
+
+    def set_points_world(self,points):
+        """sets the points from their coordinates (Nx3) relative to the world"""
+        if self.__frame == None:
+            self.points = points
+        else:
+            self.points = self.__frame.points_local(points)
+
+    def mul(self,obj):
+        """left multiplication of the points with obj, a so3 (rotation) or se3
+        (homogeneous transf.) object, i.e. the points are rotated and
+        translated relative to frame"""
+        if isinstance(obj,so3):
+            self.points = np.dot(self.__points,obj.rot.T)
+        elif isinstance(obj,se3):
+            self.points = np.dot(self.__points,obj.rot.T) + obj.dis.reshape(3)
+        else:
+            raise TypeError("({0.__class__.__name__}, mul), obj is of wrong type.".format(self))
+
+# registry of a complete hierarchy of frames, to update the poses relative
+# to the world of all frames at once, after a batch of changes (e.g. of
+# all links of a number of robots), instead of recursing for every frame
+class frame_tree(object):
+    def __init__(self,*roots):
+        """initialization of object, roots are the frames at the top of the
+        hierarchy, all frames defined relative to them (recursively) are
+        part of the tree
+        Example:
+        >>> F0 = frame(label='0')
+        >>> L1 = link(F0,a=1)
+        >>> L2 = link(L1.frame,a=1)
+        >>> tree = frame_tree(F0)
+        >>> L1.q = 30; L2.q = 40
+        >>> tree.update()   # all world poses in one pass
+        """
+        self.__roots = list(roots)
+        self.__version = None
+
+    def __build(self):
+        """sorts the frames level by level (topologically), and stores
+        for each frame the index of its parent in the previous level"""
+        levels = [(list(self.__roots),None)]
+        while True:
+            parents = levels[-1][0]
+            frames = []
+            index = []
+            for i,parent in enumerate(parents):
+                for child in parent.children:
+                    frames.append(child)
+                    index.append(i)
+            if len(frames) == 0:
+                break
+            levels.append((frames,np.array(index)))
+        self.__levels = levels
+        self.__version = _hierarchy_version
+
+    @property
+    def levels(self):
+        """lists of frames per level, the first level contains the roots"""
+        if self.__version != _hierarchy_version:
+            self.__build()
+        return [frames for frames,index in self.__levels]
+
+    @property
+    def frames(self):
+        """all frames in the tree, in topological order (parents before children)"""
+        return [F for frames in self.levels for F in frames]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def update(self):
+        """recalculates the poses relative to the world of all frames in the
+        tree, for each level with one (vectorized) multiplication of the
+        poses of the parents with the relative poses of the frames"""
+        if self.__version != _hierarchy_version:
+            self.__build()
+        frames,index = self.__levels[0]
+        H_world = np.array([F.hom_world() for F in frames])
+        for F,H in zip(frames,H_world):
+            F._set_world(H)
+        for frames,index in self.__levels[1:]:
+            H = np.array([F.hom for F in frames])
+            H_world = np.matmul(H_world[index],H)
+            for F,H in zip(frames,H_world):
+                F._set_world(H)
+
 class display(visual.display):
     def camera(self,frame=None,center=[0,0,0],forward=[0,0,-1],up=[0,1,0]):
         if frame==None:
@@ -0,0 +1,736 @@
+# This module groups.py provides the python classes so3 and se3 for
+# rotations and homogeneous transformations, without any visualization,
+# such that kinematics can be calculated without a display (e.g. in worker
+# processes or on a server). Visualization is provided on top of this module
+# by frames.py
+# The classes so3_array and se3_array hold N rotations (Nx3x3) or N homogeneous
+# transformations (Nx4x4) in one numpy array, for vectorized calculations on
+# many rotations or poses at once.
+#
+# Dependencies:
+# numpy:              for matrices, vectors and linear algebra
+# transformations.py: to calculate rotation and homogenous transformations
+
+# Author:    Rufus Fraanje, p.r.fraanje@hhs.nl
+
+
+from __future__ import division, print_function  # to improve compatibility with python 3
+
+import numpy as np             # numpy for matrix/vector calc.: http://numpy.scipy.org
+import transformations as tf   # for all kind of rotations etc.: http://www.lfd.uci.edu/~gohlke/code/transformations.py.html
+from abc import ABCMeta        # so that so3_compact and se3_compact are so3 and se3 objects
+
+# to control numerical drift, products of so3 and se3 objects (and of their
+# array and compact variants) are orthonormalized after this number of
+# successive multiplications, set to 0 to never orthonormalize automatically
+orthonormalize_every = 100
+
+# base class of _so3_base and _se3_base, the compact variants of so3 and se3 do
+# not inherit the storage (slots) of so3 and se3, but are registered as virtual
+# subclasses, such that isinstance(obj,so3) is True for them as well
+_abc = ABCMeta('_abc',(object,),{'__slots__':()})
+
+# some old versions of numpy don't have the method isclose
+# therefore, use the function below:
+def isclose(a,b):
+    if "isclose" in dir(np):
+        return np.isclose(a,b)
+    else:
+        return abs(a-b)<1e-6
+
+
+# definition of Special Orthogonal Group SE(3) of
+# (right handed) rotation matrices
+# for more about classes in python: https://docs.python.org/2/tutorial/classes.html
+# also see: http://anandology.com/python-practice-book/object_oriented_programming.html
+# the behaviour of so3 objects (products, transpose, etc.), that only uses the
+# property rot, so3 (below) and so3_compact add how the rotation matrix is stored
+class _so3_base(_abc):
+    __slots__ = ('_ncomp',)
+
+    @property
+    def T(self):
+        """returns a new so3 object with transposed (i.e. inverse) rotation matrix"""
+        return so3._trusted(self.rot.T.copy())
+
+# inverse of rotation matrix is equal to transpose, so does not need to be implemented
+#    @property
+#    def inv(self):
+#        ret = so3()
+#        ret.rot = np.linalg.inv(self.rot)
+#        return ret
+
+# calculation of determinant (in fact not necessary as well, because should be 1 always)
+    @property
+    def det(self):
+        """returns the determinant of the rotation matrix (should be 1)"""
+        return np.linalg.det(self.rot)
+
+# the __repr__ method of a class defines how objects are shown in python, e.g.
+# >>> a = 2
+# >>> a  # __repr__ functions of variable a is called, is same as:
+# >>> print(a.__repr__()) # print the output string of the repr function of a
+    def __repr__(self):
+        """repr function, defines how object is shown in python interpreter"""
+        string = "{0.__class__.__name__}: (rotation matrix)\n\n".format(self)
+        string += "rot:\n"
+        string += self.rot.__repr__()
+        return string
+
+# definition of the multiplication operator '*', in python one can define arithmatic
+# operators, like '-', '+', '*', '/', etc. use with objects
+# see e.g.: https://docs.python.org/2/reference/datamodel.html?highlight=init__#object.__mul__
+    def __mul__(self,other):
+        """multiplication of two so3 objects
+        Example:
+        >>> Rz  = so3(angle=30)
+        >>> Ry  = so3(angle=60,axis=[0,1,0])
+        >>> Rzy = Rz*Ry           # new object, equivalent to Rzy = Rz * Ry
+        multiplication with a frame or point is handled by the frame class
+        in frames.py, so for other objects NotImplemented is returned
+        """
+        if isinstance(other,so3):
+            return _product(so3,np.dot(self.rot,other.rot),self,other)
+        return NotImplemented
+
+    def __rmul__(self,other):
+        """multiplication of two so3 objects, see __mul__()"""
+        if isinstance(other,so3):
+            return _product(so3,np.dot(other.rot,self.rot),other,self)
+        return NotImplemented
+
+
+class so3(_so3_base):
+    __slots__ = ('__rot',) # no __dict__ per object, to save memory
+    def __init__(self,angle=0,axis=[0,0,1],unit='deg'):
+        """initialization of object, rotation with angle around the vector axis,
+           angle is specified in degrees (default) or radians (unit='rad')"""
+        if unit == 'deg': angle = angle*np.pi/180
+        # otherwise, angle is assumed to be in radians
+        self.__rot = tf.rotation_matrix(angle,axis)[0:3,0:3]
+
+# results of closed operations (products, transposes) of so3 objects are in so3
+# by construction, so these are not checked again with is_so3 (which would
+# cost a determinant and an allclose on every multiplication)
+    @classmethod
+    def _trusted(cls,R):
+        """returns a new object with rotation matrix R, without checking R
+        with is_so3, only to be used for R that is in so3 by construction"""
+        ret = cls.__new__(cls)
+        ret.__rot = R
+        return ret
+
+# properties are excellent for quickly getting or setting values
+# see more on this: https://docs.python.org/2/library/functions.html?highlight=property#property
+    @property
+    def rot(self):
+        """return or set the rotation matrix, a 3x3 numpy array
+        Example:
+        >>> R1 = so3(np.pi/4,axis=[1,0,0],unit='rad')
+        >>> R2 = so3(60,axis=[1,0,0])           # by default unit is in degrees
+        >>> R1.rot
+        >>> R2.rot
+        >>> R1.rot = np.eye(3)                  # set rotation to identity
+        >>> R2.rot = [[1,0,0],[0,1,0],[0,0,1]]  # set rotation to identity
+        >>> R2.rot = [1,0,0,0,1,0,0,0,1]        # set rotation to identity
+        """
+        return self.__rot
+    @rot.setter                                 # setter allows to set property
+    def rot(self,R):
+        R = np.array(R).reshape(3,3)
+        if is_so3(R):
+            self.__rot = R
+        else:
+            raise ValueError("(class {0.__class__.__name__}, rot): R is not in so3 (not symmetric and/or det(R)=1)".format(self))
+
+
+# function to determine whether a matrix is a 3x3 right handed rotation matrix
+def is_so3(R,info=False):
+    """checks whether R is in so3, i.e., is a right handed rotation
+    >>> is_so3(np.eye(3))          # returns true
+    >>> is_so3(np.random.randn(3)) # generally returns False
+    info can be set to True to make the function more verbous
+    """
+    if isinstance(R,so3):
+        Rmat = R.rot
+    else:
+        Rmat = R
+    det = np.linalg.det(Rmat)
+    is_symmetric = np.allclose(np.dot(Rmat.T,Rmat),np.eye(3))
+    if not(isclose(det,1)):
+        if isclose(det,-1):
+            if info: print("det(R)=-1, rotations in so3 should be right handed.")
+            return False
+        else:
+            if info: print("det(R)={0} and not 1, so R is not a rotation matrix.".format(det))
+            return False
+    else:
+        if is_symmetric:
+            return True
+        else:
+            if info: print("R is not symmetric.")
+            return False
+
+# function to determine whether a matrix is a homogeneous transformation matrix:
+def is_se3(H,info=False):
+    """checks whether H is in se3, i.e., is a homogenous transformation,
+    in fact, checks whether H[0:3,0:3] is a rotation with is_so3(H[0:3,0:3])
+    and checks wether last row of H, i.e., H[3,:], equals [0,0,0,1]
+    >>> is_se3(np.eye(4))          # returns True
+    >>> is_se3(np.random.randn(3)) # generally returns False
+    info can be set to True to make the function more verbous
+    """
+    if isinstance(H,se3):
+        Hmat = H.hom
+    else:
+        Hmat = H
+    Hmat = np.array(Hmat).reshape((4,4))
+    check = True
+    check &= (Hmat[3,:]==np.array([0,0,0,1])).all()
+    if (not(check)) & info: print("Last row of H (H[3,:]) is not [0,0,0,1].")
+    check &= is_so3(Hmat[0:3,0:3],info=info)
+    return check
+
+
+# definition of Special Euclidian Group SE(3) of
+# homogenous transformation matrices for rigid motions
+# the behaviour of se3 objects (products, inverse, etc.), that only uses the
+# properties dis, rot, hom and hom_inv, se3 (below) and se3_compact add how
+# these are stored
+class _se3_base(_abc):
+    __slots__ = ('_ncomp',)
+
+    @property
+    def T(self):
+        ret = se3()
+        ret.hom = self.hom.T
+        return ret
+
+    @property
+    def inv(self):
+        return se3._trusted(self.hom_inv.copy())
+
+    @property
+    def det(self):
+        return np.linalg.det(self.hom)
+
+    def __repr__(self):
+        string = "{0.__class__.__name__}: (homogenous transf. matrix)\n\n".format(self)
+        string += "hom:\n"
+        string += self.hom.__repr__()
+        return string
+
+    def __mul__(self,other):
+        # multiplication with a frame or point is handled by the frame class
+        # in frames.py
+        if isinstance(other,se3):
+            return _product(se3,np.dot(self.hom,other.hom),self,other)
+        return NotImplemented
+
+    def __rmul__(self,other):
+        if isinstance(other,se3):
+            return _product(se3,np.dot(other.hom,self.hom),other,self)
+        return NotImplemented
+
+
+class se3(_se3_base):
+    __slots__ = ('__dis','__rot','__hom','__hom_inv')
+    def __init__(self,dis=[0,0,0],angle=0,axis=[0,0,1],unit='deg'):
+        """initialization of object, dis = displacement, angle is the angle of
+        rotation around the vector axis, unit is the unit of the angle."""
+        self.__dis = np.array(dis).reshape((3,1))
+        if unit == 'deg': angle = angle*np.pi/180.
+        # otherwise, angle is assumed to be in radians
+        self.__rot = tf.rotation_matrix(angle,axis)[0:3,0:3]
+
+        self.__hom     = np.vstack( (np.hstack((self.__rot,self.__dis)), np.array([0,0,0,1])))
+        self.__hom_inv = None # calculated when needed, see hom_inv
+
+    @classmethod
+    def _trusted(cls,H):
+        """returns a new object with homogeneous transformation matrix H,
+        without checking H with is_se3, only to be used for H that is in se3
+        by construction (e.g. products and inverses of se3 objects)"""
+        ret = cls.__new__(cls)
+        ret.__hom = H
+        ret.__dis = H[0:3,3].reshape((3,1))
+        ret.__rot = H[0:3,0:3]
+        ret.__hom_inv = None
+        return ret
+
+    @property
+    def dis(self):
+        return self.__dis
+    @dis.setter
+    def dis(self,dis):
+        self.__dis = np.array(dis).reshape((3,1))
+        self.__hom[0:3,3] = self.__dis.reshape(3)
+        self.__hom_inv = None
+
+    @property
+    def rot(self):
+        return self.__rot
+    @rot.setter
+    def rot(self,R):
+        R = np.array(R).reshape((3,3))
+        if is_so3(R):
+            self.__rot = R
+            self.__hom[0:3,0:3] = R
+            self.__hom_inv = None
+        else:
+            raise ValueError("(class {0.__class__.__name__}, rot): R is not in so3 (not symmetric and/or det(R)=1)".format(self))
+
+    @property
+    def hom(self):
+        return self.__hom
+    @hom.setter
+    def hom(self,H):
+        H = np.array(H).reshape((4,4))
+        if is_se3(H):
+            self.__hom = H
+            self.__dis = H[0:3,3].reshape((3,1))
+            self.__rot = H[0:3,0:3]
+            self.__hom_inv = None
+        else:
+            raise ValueError("(class {0.__class__.__name__}, hom): H is not in se3.".format(self))
+
+    @property
+    def hom_inv(self):
+        """inverse of hom, only calculated when requested (and after a change
+        of dis, rot or hom)"""
+        if self.__hom_inv is None:
+            self.__hom_inv = np.vstack( (np.hstack((self.__rot.T,-np.dot(self.__rot.T,self.__dis))), np.array([0,0,0,1])))
+        return self.__hom_inv
+
+
+# function to make (almost) rotation matrices orthonormal again:
+def orthonormalize(R):
+    """returns the nearest rotation matrices (in Frobenius norm) of the
+    matrices R (3x3 or Nx3x3), calculated with the singular value
+    decomposition R = U S V^T as U diag(1,1,det(U V^T)) V^T. For homogeneous
+    transformation matrices (4x4 or Nx4x4) the rotation parts are
+    orthonormalized.
+    >>> R = so3(30).rot + 1e-6*np.random.randn(3,3)  # e.g. after drift
+    >>> is_so3(orthonormalize(R))                    # returns True
+    """
+    R = np.array(R,dtype=float)
+    if R.shape[-2:] == (4,4):
+        H = R.copy()
+        H[...,0:3,0:3] = orthonormalize(R[...,0:3,0:3])
+        return H
+    U, S, Vt = np.linalg.svd(R)
+    U[...,:,2] *= np.sign(np.linalg.det(np.matmul(U,Vt)))[...,None]
+    return np.matmul(U,Vt)
+
+def _product(cls,M,*factors):
+    """returns cls._trusted(M) for the product M of the factors, where M is
+    orthonormalized when the number of successive multiplications (counted
+    in the attribute _ncomp) reaches orthonormalize_every"""
+    ncomp = 1 + max(getattr(factor,'_ncomp',0) for factor in factors)
+    if orthonormalize_every and ncomp >= orthonormalize_every:
+        M = orthonormalize(M)
+        ncomp = 0
+    ret = cls._trusted(M)
+    ret._ncomp = ncomp
+    return ret
+
+# function to check a whole array of rotation matrices at once:
+def is_so3_array(R,rtol=1e-5,atol=1e-8):
+    """checks for an array of N matrices R (Nx3x3), or a so3_array object or
+    list of so3 objects, which of them are in so3, i.e., are right handed
+    rotations. Returns a tuple (valid, orth_err, det_err) of N-arrays:
+    valid:    boolean mask, True for the rotation matrices
+    orth_err: the largest absolute element of R^T R - I
+    det_err:  |det(R) - 1|
+    A matrix is valid when the elements of R^T R - I and det(R) - 1 are
+    within atol + rtol*|I| and atol + rtol, like np.isclose (the defaults
+    are the tolerances of is_so3)
+    >>> valid, orth_err, det_err = is_so3_array(np.random.randn(1000,3,3))
+    """
+    if isinstance(R,so3_array):
+        R = R.rot
+    elif isinstance(R,(list,tuple)):
+        R = [r.rot if isinstance(r,so3) else r for r in R]
+    R = np.array(R,dtype=float).reshape((-1,3,3))
+    E = np.einsum('nji,njk->nik',R,R) - np.eye(3)
+    det_err = np.abs(np.linalg.det(R) - 1)
+    orth_err = np.abs(E).max(axis=(1,2))
+    valid = (np.abs(E) <= atol + rtol*np.eye(3)).all(axis=(1,2)) & (det_err <= atol + rtol)
+    return valid, orth_err, det_err
+
+def is_se3_array(H,rtol=1e-5,atol=1e-8):
+    """checks for an array of N matrices H (Nx4x4), or a se3_array object or
+    list of se3 objects, which of them are in se3, i.e., are homogeneous
+    transformations. Returns a tuple (valid, orth_err, det_err) of N-arrays,
+    where valid is False as well if the last row of H is not [0,0,0,1], and
+    orth_err and det_err are of the rotations H[:,0:3,0:3], see is_so3_array
+    >>> valid, orth_err, det_err = is_se3_array(trajectory, atol=1e-6)
+    """
+    if isinstance(H,se3_array):
+        H = H.hom
+    elif isinstance(H,(list,tuple)):
+        H = [h.hom if isinstance(h,se3) else h for h in H]
+    H = np.array(H,dtype=float).reshape((-1,4,4))
+    valid, orth_err, det_err = is_so3_array(H[:,0:3,0:3],rtol=rtol,atol=atol)
+    valid &= (H[:,3,:]==np.array([0,0,0,1])).all(axis=1)
+    return valid, orth_err, det_err
+
+
+# array of N homogeneous transformations (Nx4x4), all operations are vectorized
+# over the N transformations, so there is no python loop or python object per
+# transformation
+class se3_array(object):
+    def __init__(self,hom=np.eye(4)):
+        """initialization of object, hom is an array of N homogeneous
+        transformation matrices (Nx4x4), a single 4x4 matrix or a list of se3
+        objects
+        Example:
+        >>> Hs = se3_array([se3(dis=[1,0,0]),se3(angle=30)])
+        >>> Hs = se3_array(np.tile(np.eye(4),(1000,1,1)))
+        """
+        self.hom = hom
+
+    @classmethod
+    def _trusted(cls,H):
+        """returns a new object with the Nx4x4 array H, without checking H,
+        only to be used for H that is in se3 by construction"""
+        ret = cls.__new__(cls)
+        ret.__hom = H
+        return ret
+
+    @property
+    def hom(self):
+        """return or set the homogeneous transformation matrices, a Nx4x4 numpy array"""
+        return self.__hom
+    @hom.setter
+    def hom(self,H):
+        if isinstance(H,(list,tuple)):
+            H = [h.hom if isinstance(h,se3) else h for h in H]
+        H = np.array(H,dtype=float).reshape((-1,4,4))
+        valid = is_se3_array(H)[0]
+        if valid.all():
+            self.__hom = H
+        else:
+            raise ValueError("(class {0.__class__.__name__}, hom): H[{1}] is not in se3.".format(self,np.flatnonzero(~valid)[0]))
+
+    @property
+    def rot(self):
+        """rotation parts (Nx3x3), a view on hom"""
+        return self.__hom[:,0:3,0:3]
+
+    @property
+    def dis(self):
+        """displacement parts (Nx3x1), a view on hom"""
+        return self.__hom[:,0:3,3:4]
+
+    @property
+    def hom_inv(self):
+        """inverses of the homogeneous transformations (Nx4x4), calculated
+        from the rotation R and displacement p as [R^T, -R^T p; 0 0 0 1]"""
+        Rt = np.swapaxes(self.rot,1,2)
+        H = np.zeros_like(self.__hom)
+        H[:,0:3,0:3] = Rt
+        H[:,0:3,3:4] = -np.matmul(Rt,self.dis)
+        H[:,3,3] = 1
+        return H
+
+    @property
+    def inv(self):
+        return se3_array._trusted(self.hom_inv)
+
+    def apply(self,points):
+        """transforms points, points is a single point (3), one point per
+        transformation (Nx3) or M points per transformation (NxMx3)"""
+        p = np.array(points,dtype=float)
+        if p.ndim == 3:
+            return np.einsum('nij,nmj->nmi',self.rot,p) + self.dis.reshape((-1,1,3))
+        return np.einsum('nij,nj->ni',self.rot,np.broadcast_to(p,(len(self),3))) + self.dis.reshape((-1,3))
+
+    def __len__(self):
+        return self.__hom.shape[0]
+
+    def __getitem__(self,index):
+        """integer index returns an se3 object, slices, index arrays
+        or boolean masks return an se3_array"""
+        if isinstance(index,(int,np.integer)):
+            return se3._trusted(self.__hom[index].copy())
+        return se3_array._trusted(self.__hom[index].reshape((-1,4,4)).copy())
+
+    def __repr__(self):
+        string = "{0.__class__.__name__}: ({1} homogenous transf. matrices)\n\n".format(self,len(self))
+        string += "hom:\n"
+        string += self.hom.__repr__()
+        return string
+
+    def __mul__(self,other):
+        """multiplication with another se3_array or a se3 object, with
+        broadcasting: a single transformation (se3 or se3_array of length 1)
+        is combined with all N transformations of the other operand
+        Example:
+        >>> H0s = se3_array(np.tile(np.eye(4),(100,1,1)))
+        >>> H1s = H0s*se3(dis=[0,0,1])     # shift all 100 frames along z
+        """
+        if isinstance(other,(se3,se3_array)):
+            return _product(se3_array,_compose_hom(self.hom,other.hom),self,other)
+        return NotImplemented
+
+    def __rmul__(self,other):
+        if isinstance(other,se3):
+            return _product(se3_array,_compose_hom(other.hom,self.hom),other,self)
+        return NotImplemented
+
+def _compose_hom(H1,H2):
+    """product H1*H2 of (arrays of) homogeneous transformations, computed
+    from the rotation and displacement parts: R = R1 R2, p = R1 p2 + p1"""
+    R1 = H1[...,0:3,0:3]
+    R = np.matmul(R1,H2[...,0:3,0:3])
+    H = np.zeros(R.shape[:-2]+(4,4))
+    H[...,0:3,0:3] = R
+    H[...,0:3,3:4] = np.matmul(R1,H2[...,0:3,3:4]) + H1[...,0:3,3:4]
+    H[...,3,3] = 1
+    return H
+
+
+def _rotation_matrices(angle,axis):
+    """rotation matrices (Nx3x3) for arrays of angles (in radians) and axes,
+    calculated with the formula of Rodrigues, like tf.rotation_matrix does
+    for a single angle and axis"""
+    angle = np.atleast_1d(np.array(angle,dtype=float))
+    axis = np.array(axis,dtype=float).reshape((-1,3))
+    axis = axis/np.sqrt(np.sum(axis**2,axis=1)).reshape((-1,1))
+    n = max(len(angle),len(axis))
+    angle = np.broadcast_to(angle,(n,)).reshape((n,1,1))
+    axis = np.broadcast_to(axis,(n,3))
+    c = np.cos(angle)
+    s = np.sin(angle)
+    x, y, z = axis[:,0], axis[:,1], axis[:,2]
+    zero = np.zeros(n)
+    K = np.stack((np.stack((zero,-z,y),axis=1),
+                  np.stack((z,zero,-x),axis=1),
+                  np.stack((-y,x,zero),axis=1)),axis=1)     # cross product matrices
+    return c*np.eye(3) + (1-c)*axis[:,:,None]*axis[:,None,:] + s*K
+
+
+# array of N rotation matrices (Nx3x3), all operations are vectorized over
+# the N rotations
+class so3_array(object):
+    def __init__(self,angle=0,axis=[0,0,1],unit='deg'):
+        """initialization of object, rotations with the angles around the axes,
+        angle is an array of N angles and axis a single axis or an array of N
+        axes (Nx3), angles are in degrees (default) or radians (unit='rad')
+        Example:
+        >>> Rs = so3_array(np.linspace(0,360,1000))              # about z-axis
+        >>> Rs = so3_array([10,20],axis=[[1,0,0],[0,1,0]])
+        >>> Rs = so3_array(); Rs.rot = [so3(10),so3(20)]          # from so3 objects
+        """
+        angle = np.array(angle,dtype=float)
+        if unit == 'deg': angle = angle*np.pi/180
+        # otherwise, angle is assumed to be in radians
+        self.__rot = _rotation_matrices(angle,axis)
+
+    @classmethod
+    def _trusted(cls,R):
+        """returns a new object with the Nx3x3 array R, without checking R,
+        only to be used for R that is in so3 by construction"""
+        ret = cls.__new__(cls)
+        ret.__rot = R
+        return ret
+
+    @property
+    def rot(self):
+        """return or set the rotation matrices, a Nx3x3 numpy array, can be
+        set with a Nx3x3 array, a single 3x3 matrix or a list of so3 objects"""
+        return self.__rot
+    @rot.setter
+    def rot(self,R):
+        if isinstance(R,(list,tuple)):
+            R = [r.rot if isinstance(r,so3) else r for r in R]
+        R = np.array(R,dtype=float).reshape((-1,3,3))
+        valid = is_so3_array(R)[0]
+        if valid.all():
+            self.__rot = R
+        else:
+            raise ValueError("(class {0.__class__.__name__}, rot): R[{1}] is not in so3 (not symmetric and/or det(R)=1)".format(self,np.flatnonzero(~valid)[0]))
+
+    @property
+    def T(self):
+        """returns a new so3_array object with transposed (i.e. inverse) rotation matrices"""
+        return so3_array._trusted(np.swapaxes(self.rot,1,2).copy())
+
+    @property
+    def det(self):
+        """returns the determinants of the rotation matrices (should be 1)"""
+        return np.linalg.det(self.rot)
+
+    def apply(self,points):
+        """rotates points, points is a single point (3), one point per
+        rotation (Nx3) or M points per rotation (NxMx3)
+        Example:
+        >>> Rs = so3_array(np.linspace(0,90,10))
+        >>> Rs.apply([1,0,0])                   # returns 10x3 array
+        """
+        p = np.array(points,dtype=float)
+        if p.ndim == 3:
+            return np.einsum('nij,nmj->nmi',self.rot,p)
+        return np.einsum('nij,nj->ni',self.rot,np.broadcast_to(p,(len(self),3)))
+
+    def __len__(self):
+        return self.__rot.shape[0]
+
+    def __getitem__(self,index):
+        """integer index returns an so3 object, slices, index arrays
+        or boolean masks return an so3_array"""
+        if isinstance(index,(int,np.integer)):
+            return so3._trusted(self.__rot[index].copy())
+        return so3_array._trusted(self.__rot[index].reshape((-1,3,3)).copy())
+
+    def __repr__(self):
+        string = "{0.__class__.__name__}: ({1} rotation matrices)\n\n".format(self,len(self))
+        string += "rot:\n"
+        string += self.rot.__repr__()
+        return string
+
+    def __mul__(self,other):
+        """multiplication with another so3_array or a so3 object, with
+        broadcasting: a single rotation (so3 or so3_array of length 1) is
+        combined with all N rotations of the other operand
+        Example:
+        >>> Rz = so3_array(np.linspace(0,360,1000))
+        >>> Rzy = Rz*so3(30,axis=[0,1,0])
+        """
+        if isinstance(other,(so3,so3_array)):
+            return _product(so3_array,np.matmul(self.rot,other.rot).reshape((-1,3,3)),self,other)
+        return NotImplemented
+
+    def __rmul__(self,other):
+        if isinstance(other,so3):
+            return _product(so3_array,np.matmul(other.rot,self.rot).reshape((-1,3,3)),other,self)
+        return NotImplemented
+
+
+# compact variants of so3 and se3, that store the rotation matrix (so3) or the
+# rotation matrix and displacement (se3) in one contiguous buffer of 9 or 12
+# floats, rot and dis are views on this buffer. Use these to hold many
+# (e.g. millions of recorded) poses in memory, see benchmark_memory.py. They
+# are derived from _so3_base and _se3_base, so they have no slots for the
+# matrices of so3 and se3, and are registered as (virtual) subclasses of so3
+# and se3 below
+class so3_compact(_so3_base):
+    __slots__ = ('__buf',)
+    def __init__(self,angle=0,axis=[0,0,1],unit='deg'):
+        """initialization of object, rotation with angle around the vector axis,
+           angle is specified in degrees (default) or radians (unit='rad')"""
+        if unit == 'deg': angle = angle*np.pi/180
+        # otherwise, angle is assumed to be in radians
+        self.__buf = np.empty(9) # 3x3 matrix R, row by row
+        self.__buf.reshape((3,3))[:] = tf.rotation_matrix(angle,axis)[0:3,0:3]
+
+    @classmethod
+    def _trusted(cls,R):
+        ret = cls.__new__(cls)
+        ret.__buf = np.empty(9)
+        ret.__buf.reshape((3,3))[:] = R
+        return ret
+
+    @property
+    def rot(self):
+        """return or set the rotation matrix, a 3x3 view on the buffer"""
+        return self.__buf.reshape((3,3))
+    @rot.setter
+    def rot(self,R):
+        R = np.array(R,dtype=float).reshape(3,3)
+        if is_so3(R):
+            self.__buf[:] = R.reshape(9)
+        else:
+            raise ValueError("(class {0.__class__.__name__}, rot): R is not in so3 (not symmetric and/or det(R)=1)".format(self))
+
+    @property
+    def T(self):
+        return so3_compact._trusted(self.rot.T)
+
+    def __mul__(self,other):
+        if isinstance(other,so3_compact):
+            return _product(so3_compact,np.dot(self.rot,other.rot),self,other)
+        return super(so3_compact,self).__mul__(other)
+
+    def __rmul__(self,other):
+        if isinstance(other,so3_compact):
+            return _product(so3_compact,np.dot(other.rot,self.rot),other,self)
+        return super(so3_compact,self).__rmul__(other)
+
+
+class se3_compact(_se3_base):
+    __slots__ = ('__buf',)
+    def __init__(self,dis=[0,0,0],angle=0,axis=[0,0,1],unit='deg'):
+        """initialization of object, dis = displacement, angle is the angle of
+        rotation around the vector axis, unit is the unit of the angle."""
+        if unit == 'deg': angle = angle*np.pi/180.
+        # otherwise, angle is assumed to be in radians
+        self.__buf = np.empty(12) # 3x4 matrix [R p], row by row
+        buf = self.__buf.reshape((3,4))
+        buf[:,0:3] = tf.rotation_matrix(angle,axis)[0:3,0:3]
+        buf[:,3] = np.array(dis,dtype=float).reshape(3)
+
+    @classmethod
+    def _trusted(cls,H):
+        ret = cls.__new__(cls)
+        ret.__buf = np.empty(12)
+        ret.__buf.reshape((3,4))[:] = H[0:3,:]
+        return ret
+
+    @property
+    def dis(self):
+        """return or set the displacement, a 3x1 view on the buffer"""
+        return self.__buf.reshape((3,4))[:,3:4]
+    @dis.setter
+    def dis(self,dis):
+        self.__buf.reshape((3,4))[:,3] = np.array(dis,dtype=float).reshape(3)
+
+    @property
+    def rot(self):
+        """return or set the rotation matrix, a 3x3 view on the buffer"""
+        return self.__buf.reshape((3,4))[:,0:3]
+    @rot.setter
+    def rot(self,R):
+        R = np.array(R,dtype=float).reshape((3,3))
+        if is_so3(R):
+            self.__buf.reshape((3,4))[:,0:3] = R
+        else:
+            raise ValueError("(class {0.__class__.__name__}, rot): R is not in so3 (not symmetric and/or det(R)=1)".format(self))
+
+    @property
+    def hom(self):
+        """return or set the homogeneous transformation matrix, which is a new
+        4x4 array (not a view), because the row [0,0,0,1] is not stored, so,
+        unlike for se3, changing its elements (e.g. C.hom[0,3] = 1) does not
+        change the object, set C.dis, C.rot or C.hom instead"""
+        return np.vstack((self.__buf.reshape((3,4)),np.array([0,0,0,1.])))
+    @hom.setter
+    def hom(self,H):
+        H = np.array(H,dtype=float).reshape((4,4))
+        if is_se3(H):
+            self.__buf[:] = H[0:3,:].reshape(12)
+        else:
+            raise ValueError("(class {0.__class__.__name__}, hom): H is not in se3.".format(self))
+
+    @property
+    def hom_inv(self):
+        Rt = self.rot.T
+        return np.vstack((np.hstack((Rt,-np.dot(Rt,self.dis))),np.array([0,0,0,1.])))
+
+    @property
+    def inv(self):
+        return se3_compact._trusted(self.hom_inv)
+
+    def __mul__(self,other):
+        if isinstance(other,se3_compact):
+            return _product(se3_compact,_compose_hom(self.hom,other.hom),self,other)
+        return super(se3_compact,self).__mul__(other)
+
+    def __rmul__(self,other):
+        if isinstance(other,se3_compact):
+            return _product(se3_compact,_compose_hom(other.hom,self.hom),other,self)
+        return super(se3_compact,self).__rmul__(other)
+
+so3.register(so3_compact)
+se3.register(se3_compact)
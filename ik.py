@@ -0,0 +1,196 @@
+# This module ik.py provides inverse kinematics for serial chains (see
+# chain.py): a numerical solver with damped least squares, that solves the
+# inverse kinematics for N target poses at once (vectorized).
+#
+# Dependencies:
+# numpy:              for matrices, vectors and linear algebra
+# groups.py:          se3 and se3_array classes
+# chain.py:           chain class (forward kinematics and Jacobians)
+# lie.py:             log_so3 for the orientation error
+
+# Author:    Rufus Fraanje, p.r.fraanje@hhs.nl
+
+
+from __future__ import division, print_function  # to improve compatibility with python 3
+
+import numpy as np             # numpy for matrix/vector calc.: http://numpy.scipy.org
+
+from groups import *
+from chain import *
+from lie import log_so3
+
+
+def _targets(targets):
+    """homogeneous transformation matrices (Nx4x4) of target poses, which
+    can be a se3 or se3_array object, a list of se3 objects, or an array of
+    homogeneous transformation matrices"""
+    if isinstance(targets,(se3,se3_array)):
+        return targets.hom.reshape((-1,4,4))
+    if isinstance(targets,(list,tuple)) and len(targets) > 0 and isinstance(targets[0],se3):
+        return np.array([T.hom for T in targets])
+    return np.array(targets,dtype=float).reshape((-1,4,4))
+
+def pose_error(H,targets):
+    """errors (Nx6) [e_p, e_w] between poses H (Nx4x4) and targets (Nx4x4),
+    e_p is the position error and e_w the rotation vector (in rad) of the
+    rotation from H to the target, relative to the world, such that a
+    velocity [v; w] = [e_p; e_w] moves H to the target in unit time (to
+    first order)"""
+    e = np.empty(H.shape[:-2]+(6,))
+    e[...,0:3] = targets[...,0:3,3] - H[...,0:3,3]
+    e[...,3:6] = log_so3(np.matmul(targets[...,0:3,0:3],np.swapaxes(H[...,0:3,0:3],-1,-2)))
+    return e
+
+def ik_dls(robot,targets,q0=None,qlim=None,damping=0.01,tol=1e-6,max_iter=100):
+    """numerical inverse kinematics of the chain robot, for N target poses
+    at once, with damped least squares:
+        q <- q + J^T (J J^T + damping^2 I)^-1 e
+    with J the geometric Jacobian and e the pose error (see pose_error()),
+    q0 are the initial joint variables (warm start, N x dof, or dof for all
+    targets, default robot.q), qlim (dof x2) are the lower and upper limits
+    of the joint variables (in the unit of the chain), only the targets
+    that have not converged (position and rotation error smaller than tol)
+    are updated, at most max_iter times. Returns the joint variables (N x
+    dof) and a mask (N) that is True for the targets that have converged
+    Example:
+    >>> R = ur5()
+    >>> targets = R.fk_array(np.random.uniform(-90,90,(1000,6)))
+    >>> q, converged = ik_dls(R,targets,q0=np.zeros(6))
+    >>> q, converged = ik_dls(R,targets,q0=q)   # warm start
+    """
+    H_t = _targets(targets)
+    n = len(H_t)
+    if q0 is None:
+        q0 = robot.q
+    q = np.array(np.broadcast_to(np.asarray(q0,dtype=float),(n,robot.dof)))
+    if qlim is not None:
+        qlim = np.array(qlim,dtype=float).reshape((robot.dof,2))
+        q = np.clip(q,qlim[:,0],qlim[:,1])
+    # the steps are calculated for revolute joints in rad (also when the
+    # unit of the chain is deg), to have the same damping for both units
+    scale = np.array([np.pi/180 if (j == 'r' and robot.unit == 'deg') else 1. for j in robot.joint])
+    converged = np.zeros(n,dtype=bool)
+    active = np.arange(n)                       # targets to update
+    I = damping**2*np.eye(6)
+    for k in range(max_iter+1):
+        H, z, o = robot._pose_axes(q[active])
+        e = pose_error(H,H_t[active])
+        done = (np.sqrt(np.sum(e[:,0:3]**2,axis=1)) < tol) & (np.sqrt(np.sum(e[:,3:6]**2,axis=1)) < tol)
+        converged[active[done]] = True
+        active, e, z, o = active[~done], e[~done], z[~done], o[~done]
+        if len(active) == 0 or k == max_iter:
+            break
+        J = robot._jacobian(z,o)/scale
+        dq = np.matmul(np.swapaxes(J,-1,-2),np.linalg.solve(np.matmul(J,np.swapaxes(J,-1,-2)) + I,e[...,None]))[...,0]
+        q[active] += dq/scale
+        if qlim is not None:
+            q[active] = np.clip(q[active],qlim[:,0],qlim[:,1])
+    return q, converged
+
+def _inv_hom(H):
+    """inverses of homogeneous transformation matrices H (...x4x4)"""
+    H_inv = np.zeros(H.shape)
+    Rt = np.swapaxes(H[...,0:3,0:3],-1,-2)
+    H_inv[...,0:3,0:3] = Rt
+    H_inv[...,0:3,3] = -np.matmul(Rt,H[...,0:3,3:4])[...,0]
+    H_inv[...,3,3] = 1
+    return H_inv
+
+def _wrap(angle):
+    """angles wrapped to [-pi,pi)"""
+    return np.mod(angle + np.pi,2*np.pi) - np.pi
+
+def ik_ur5(robot,targets,tol=1e-9):
+    """analytic inverse kinematics of the UR5 (or of another chain with the
+    same structure, e.g. the UR3 and UR10: six revolute joints, with
+    a1 = a4 = a5 = a6 = 0, d2 = d3 = 0, alpha2 = alpha3 = alpha6 = 0 and
+    alpha1, alpha4, alpha5 = +-90 deg), for N target poses at once.
+    Returns the joint variables (N x8 x6, in the unit of the chain, within
+    [-180,180) deg or [-pi,pi) rad) of the 8 branches (shoulder left/right,
+    wrist up/down, elbow up/down) and a mask (N x8) that is True for the
+    branches that exist (the target is reachable), see closest_branch()
+    for the branch closest to a reference configuration. At a wrist
+    singularity (q5 = 0), q6 is set to 0
+    Example:
+    >>> R = ur5()
+    >>> targets = R.fk_array(np.random.uniform(-180,180,(1000,6)))
+    >>> q, valid = ik_ur5(R,targets)               # 1000x8x6, 1000x8
+    """
+    to_rad = np.pi/180 if robot.unit == 'deg' else 1.
+    a, d = robot.a, robot.d
+    alpha, theta = robot.alpha*to_rad, robot.theta*to_rad
+    s_alpha = np.round(np.sin(alpha))
+    if (robot.joint != 'rrrrrr' or np.any(a[[0,3,4,5]] != 0) or np.any(d[[1,2]] != 0) or
+        np.any(np.abs(np.cos(alpha[[0,3,4]])) > 1e-12) or np.any(np.abs(np.sin(alpha[[1,2,5]])) > 1e-12)):
+        raise ValueError("(ik_ur5): robot should have the structure of the UR5.")
+    T = np.matmul(robot.base.hom_inv,_targets(targets))   # relative to frame 0
+    n = len(T)
+    th = np.zeros((n,8,6))
+    valid = np.ones((n,8),dtype=bool)
+
+    # theta1: frame 5 has a distance d4 to the plane of joints 2, 3 and 4
+    # through frame 1, with normal z1 = s_alpha1 [sin(theta1),-cos(theta1),0]
+    p5 = T[:,0:3,3] - d[5]*T[:,0:3,2]
+    r = np.sqrt(p5[:,0]**2 + p5[:,1]**2)
+    ratio = d[3]*s_alpha[0]/np.where(r > 0,r,1)
+    valid &= (np.abs(ratio) <= 1 + tol)[:,None]
+    asin = np.arcsin(np.clip(ratio,-1,1))
+    phi = np.arctan2(p5[:,1],p5[:,0])
+    th[:,0:4,0] = (phi + asin)[:,None]
+    th[:,4:8,0] = (phi + np.pi - asin)[:,None]
+
+    # theta5: z1.z6 = -s_alpha4 s_alpha5 cos(theta5)
+    z1 = s_alpha[0]*np.stack((np.sin(th[...,0]),-np.cos(th[...,0]),np.zeros((n,8))),axis=-1)
+    c5 = -s_alpha[3]*s_alpha[4]*np.sum(z1*T[:,None,0:3,2],axis=-1)
+    valid &= np.abs(c5) <= 1 + tol
+    acos = np.arccos(np.clip(c5,-1,1))
+    th[:,[0,1,4,5],4] = acos[:,[0,1,4,5]]
+    th[:,[2,3,6,7],4] = -acos[:,[2,3,6,7]]
+
+    # theta6: z1 in frame 6 is s_alpha4 [sin(theta5) cos(theta6),
+    # -sin(theta5) sin(theta6), -s_alpha5 cos(theta5)]
+    w = np.matmul(z1[...,None,:],T[:,None,0:3,0:3])[...,0,:]
+    s5 = np.sin(th[...,4])
+    singular = np.abs(s5) < 1e-7     # arccos of 1-eps is about 1e-8
+    s5 = np.where(singular,1,s5)
+    th[...,5] = np.where(singular,0,np.arctan2(-s_alpha[3]*w[...,1]/s5,s_alpha[3]*w[...,0]/s5))
+
+    # theta2, theta3, theta4: planar arm in frame 1, with
+    # A2 A3 A4 = A1^-1 T A6^-1 A5^-1
+    A1 = dh(0,alpha[0],d[0],th[...,0])
+    A5 = dh(0,alpha[4],d[4],th[...,4])
+    A6 = dh(0,0,d[5],th[...,5])
+    T14 = np.matmul(np.matmul(_inv_hom(A1),T[:,None]),_inv_hom(np.matmul(A5,A6)))
+    px, py = T14[...,0,3], T14[...,1,3]
+    c3 = (px**2 + py**2 - a[1]**2 - a[2]**2)/(2*a[1]*a[2])
+    valid &= np.abs(c3) <= 1 + tol
+    acos = np.arccos(np.clip(c3,-1,1))
+    th[:,0::2,2] = acos[:,0::2]
+    th[:,1::2,2] = -acos[:,1::2]
+    s3 = np.sin(th[...,2])
+    th[...,1] = np.arctan2(py,px) - np.arctan2(a[2]*s3,a[1] + a[2]*c3)
+    th[...,3] = np.arctan2(T14[...,1,0],T14[...,0,0]) - th[...,1] - th[...,2]
+
+    return _wrap(th - theta)/to_rad, valid
+
+def closest_branch(robot,q,valid,q_ref):
+    """the joint variables (N x dof) of the valid branch (see ik_ur5()) that
+    is closest to the reference configuration q_ref (dof, or N x dof, e.g.
+    the current configuration), with the differences of the angles
+    wrapped (so the angles can be outside [-180,180) deg), and a mask (N)
+    that is True if a valid branch exists (otherwise q is nan)
+    Example:
+    >>> q, valid = ik_ur5(R,targets)
+    >>> q_best, found = closest_branch(R,q,valid,R.q)
+    """
+    period = 360. if robot.unit == 'deg' else 2*np.pi
+    revolute = np.array([j == 'r' for j in robot.joint])
+    diff = q - np.asarray(q_ref,dtype=float)[...,None,:]
+    diff = np.where(revolute,np.mod(diff + period/2,period) - period/2,diff)
+    dist = np.where(valid,np.sum(diff**2,axis=-1),np.inf)
+    best = np.argmin(dist,axis=-1)
+    found = np.any(valid,axis=-1)
+    # for the revolute joints, the angles (modulo 360 deg) closest to q_ref
+    q_best = np.asarray(q_ref,dtype=float) + diff[np.arange(len(q)),best]
+    q_best[~found] = np.nan
+    return q_best, found
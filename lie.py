@@ -0,0 +1,120 @@
+# This module lie.py provides the exponential and logarithmic maps between
+# the Lie algebras and the groups of rotations SO(3) and rigid motions SE(3),
+# in closed form (formula of Rodrigues), vectorized over arrays of rotation
+# vectors, twists, rotation matrices and homogeneous transformations.
+#
+# A rotation vector w (3) is the axis of rotation times the angle (in rad),
+# a twist xi (6) is [v, w], with v the linear and w the angular part, like
+# in the book of Spong, Hutchinson and Vidyasagar.
+#
+# Dependencies:
+# numpy:              for matrices, vectors and linear algebra
+# groups.py:          so3 and se3 classes
+# quaternions.py:     for the (robust) conversion of rotation matrices
+
+# Author:    Rufus Fraanje, p.r.fraanje@hhs.nl
+
+
+from __future__ import division, print_function  # to improve compatibility with python 3
+
+import numpy as np             # numpy for matrix/vector calc.: http://numpy.scipy.org
+
+from groups import *
+from quaternions import quat_from_rot
+
+# below this angle (in rad), Taylor series are used for the coefficients,
+# to avoid division by (almost) zero
+_small_angle = 1e-4
+
+
+def hat(w):
+    """skew symmetric (cross product) matrices (...x3x3) of vectors w (...x3),
+    such that hat(w) v = w x v"""
+    w = np.array(w,dtype=float)
+    x, y, z = w[...,0], w[...,1], w[...,2]
+    zero = np.zeros_like(x)
+    return np.stack((np.stack((zero,-z,y),axis=-1),
+                     np.stack((z,zero,-x),axis=-1),
+                     np.stack((-y,x,zero),axis=-1)),axis=-2)
+
+def vee(K):
+    """vectors (...x3) of skew symmetric matrices K (...x3x3), inverse of hat"""
+    K = np.array(K,dtype=float)
+    return np.stack((K[...,2,1],K[...,0,2],K[...,1,0]),axis=-1)
+
+def _coefficients(theta):
+    """A = sin(theta)/theta, B = (1-cos(theta))/theta^2 and
+    C = (theta-sin(theta))/theta^3, with Taylor series for small theta"""
+    small = theta < _small_angle
+    t = np.where(small,1,theta)                                 # avoid division by 0
+    t2 = theta*theta
+    A = np.where(small,1 - t2/6,np.sin(t)/t)
+    B = np.where(small,0.5 - t2/24,(1 - np.cos(t))/(t*t))
+    C = np.where(small,1./6 - t2/120,(t - np.sin(t))/(t*t*t))
+    return A, B, C
+
+def exp_so3(w):
+    """rotation matrices (...x3x3) of rotation vectors w (...x3),
+    R = I + A hat(w) + B hat(w)^2 (Rodrigues)
+    Example:
+    >>> exp_so3([0,0,np.pi/2])                      # 90 degrees about z
+    >>> exp_so3(np.random.randn(1000,3))           # 1000 rotations at once
+    """
+    w = np.array(w,dtype=float)
+    theta = np.sqrt(np.sum(w*w,axis=-1))[...,None,None]
+    A, B, C = _coefficients(theta)
+    K = hat(w)
+    return np.eye(3) + A*K + B*np.matmul(K,K)
+
+def log_so3(R):
+    """rotation vectors w (...x3) of rotation matrices R (...x3x3), or of a
+    so3 or so3_array object, with angles in [0,pi]. Calculated from the unit
+    quaternion [cos(theta/2), sin(theta/2) w/theta] of R, which is accurate
+    for all angles (also near 0 and pi), unlike tf.rotation_from_matrix, which
+    uses an eigenvalue decomposition"""
+    if isinstance(R,(so3,so3_array)):
+        R = R.rot
+    q = quat_from_rot(R)                                        # q[...,0] >= 0
+    s = np.sqrt(np.sum(q[...,1:4]**2,axis=-1))
+    c = q[...,0]
+    small = s < _small_angle
+    # theta/s = 2 atan2(s,c)/s, which goes to 2/c for s to 0
+    factor = np.where(small,2/c*(1 - s*s/(3*c*c)),2*np.arctan2(s,c)/np.where(small,1,s))
+    return factor[...,None]*q[...,1:4]
+
+def exp_se3(xi):
+    """homogeneous transformations (...x4x4) of twists xi = [v,w] (...x6),
+    the rotation is exp_so3(w) and the displacement is V v, with
+    V = I + B hat(w) + C hat(w)^2
+    Example:
+    >>> exp_se3([1,0,0,0,0,np.pi/2])
+    """
+    xi = np.array(xi,dtype=float)
+    v, w = xi[...,0:3], xi[...,3:6]
+    theta = np.sqrt(np.sum(w*w,axis=-1))[...,None,None]
+    A, B, C = _coefficients(theta)
+    K = hat(w)
+    K2 = np.matmul(K,K)
+    H = np.zeros(xi.shape[:-1]+(4,4))
+    H[...,0:3,0:3] = np.eye(3) + A*K + B*K2
+    H[...,0:3,3] = np.matmul(np.eye(3) + B*K + C*K2,v[...,None])[...,0]
+    H[...,3,3] = 1
+    return H
+
+def log_se3(H):
+    """twists xi = [v,w] (...x6) of homogeneous transformations H (...x4x4),
+    or of a se3 or se3_array object, w = log_so3(R) and v = V^-1 p, with
+    V^-1 = I - 1/2 hat(w) + (1 - A/(2B))/theta^2 hat(w)^2"""
+    if isinstance(H,(se3,se3_array)):
+        H = H.hom
+    H = np.array(H,dtype=float)
+    w = log_so3(H[...,0:3,0:3])
+    theta = np.sqrt(np.sum(w*w,axis=-1))[...,None,None]
+    A, B, C = _coefficients(theta)
+    small = theta < _small_angle
+    t2 = np.where(small,1,theta*theta)
+    D = np.where(small,1./12 + theta*theta/720,(1 - A/(2*B))/t2)
+    K = hat(w)
+    V_inv = np.eye(3) - 0.5*K + D*np.matmul(K,K)
+    v = np.matmul(V_inv,H[...,0:3,3:4])[...,0]
+    return np.concatenate((v,w),axis=-1)
@@ -2,16 +2,13 @@
 from __future__ import division, print_function  # to improve compatibility with python 3
 
 from frames import *
+from chain import dh
 from time import sleep
 
 class link(object):
     def __init__(self,frame_rel,a=1,alpha=0,d=0,theta=0,q=0,joint='r',label='',scale=1,unit='deg'):
         self.__joint = joint
         self.__q = q
-        if self.__joint == 'p': # prismatic joint
-            self.__Hq = se3(dis=[0,0,q])
-        else:
-            self.__Hq = se3(dis=[0,0,0],angle=q,axis=[0,0,1],unit=unit)
 
         self.__unit    = unit 
         self.__alpha   = alpha
@@ -19,16 +16,15 @@ class link(object):
         self.__d       = d
         self.__theta   = theta 
 
-        self.__H_alpha = se3(dis=[0,0,0],angle=alpha,axis=[1,0,0],unit=unit)
-        self.__H_a     = se3(dis=[a,0,0])
-        self.__H_d     = se3(dis=[0,0,d])
-        self.__H_theta = se3(dis=[0,0,0],angle=theta,axis=[0,0,1],unit=unit)
-        
-        self.__hom = self.__Hq*self.__H_theta*self.__H_d*self.__H_a*self.__H_alpha
+        # hom = Hq*H_theta*H_d*H_a*H_alpha, where the factor
+        # H_theta*H_d*H_a*H_alpha does not depend on q, so it is only
+        # recalculated when a, alpha, d or theta are changed
+        self.__update_const()
+        self.__update_hom()
 
         self.__frame_rel = frame_rel
 
-        self.__frame = frame(dis=self.__hom.hom[0:3,3],rot=self.__hom.hom[0:3,0:3],label=label,frame_rel=frame_rel);
+        self.__frame = frame(dis=self.__hom.hom[0:3,3],rot=self.__hom.hom[0:3,0:3],label=label,frame_rel=frame_rel)
         self.__frame.axis.scale = scale
     
         #rotating link:
@@ -121,34 +117,15 @@ class link(object):
     @property
     def alpha(self):
         return self.__alpha
-
     @alpha.setter
     def alpha(self,alpha):
         self.__alpha = alpha
-
-        self.__H_alpha = se3(dis=[0,0,0],angle=self.__alpha,axis=[1,0,0],unit=self.__unit)
-        self.__H_a     = se3(dis=[self.__a,0,0])
-        self.__H_d     = se3(dis=[0,0,self.__d])
-        self.__H_theta = se3(dis=[0,0,0],angle=self.__theta,axis=[0,0,1],unit=self.__unit)
-        
-        self.__hom = self.__Hq*self.__H_theta*self.__H_d*self.__H_a*self.__H_alpha
-
-
-        self.__frame.hom = self.__hom.hom
-
-        self.update_view()
-
+        self.__update_const()
+        self.__update()
 
     @property
     def H_alpha(self):
-        return self.__H_alpha
-    @alpha.setter
-    def alpha(self,alpha):
-        self.__alpha = alpha
-        self.__H_alpha = se3(dis=[0,0,0],angle=self.__alpha,axis=[1,0,0],unit=self.__unit)
-        self.__hom = self.__Hq*self.__H_theta*self.__H_d*self.__H_a*self.__H_alpha
-        self.__frame.hom = self.__hom.hom
-        self.update_view()
+        return se3(dis=[0,0,0],angle=self.__alpha,axis=[1,0,0],unit=self.__unit)
 
     @property
     def a(self):
@@ -156,58 +133,78 @@ class link(object):
     @a.setter
     def a(self,a):
         self.__a = a
-        self.__H_a     = se3(dis=[self.__a,0,0])
-        self.__hom = self.__Hq*self.__H_theta*self.__H_d*self.__H_a*self.__H_alpha
-        self.__frame.hom = self.__hom.hom
-        self.update_view()
+        self.__update_const()
+        self.__update()
     @property
     def H_a(self):
-        return self.__H_a
+        return se3(dis=[self.__a,0,0])
     @property
     def d(self):
         return self.__d
     @d.setter
     def d(self,d):
         self.__d = d
-        self.__H_d     = se3(dis=[0,0,self.__d])
-        self.__hom = self.__Hq*self.__H_theta*self.__H_d*self.__H_a*self.__H_alpha
-        self.__frame.hom = self.__hom.hom
-        self.update_view()
+        self.__update_const()
+        self.__update()
 
     @property
     def H_d(self):
-        return self.__H_d
+        return se3(dis=[0,0,self.__d])
     @property
     def theta(self):
         return self.__theta
     @theta.setter
     def theta(self,theta):
         self.__theta = theta 
-        self.__H_theta = se3(dis=[0,0,0],angle=self.__theta,axis=[0,0,1],unit=self.__unit)
-        self.__hom = self.__Hq*self.__H_theta*self.__H_d*self.__H_a*self.__H_alpha
-        self.__frame.hom = self.__hom.hom
-        self.update_view()
+        self.__update_const()
+        self.__update()
 
     @property
     def H_theta(self):
-        return self.__H_theta
+        return se3(dis=[0,0,0],angle=self.__theta,axis=[0,0,1],unit=self.__unit)
 
     @property
     def Hq(self):
-        return self.__Hq
+        if self.__joint == 'p': # prismatic joint
+            return se3(dis=[0,0,self.__q])
+        return se3(dis=[0,0,0],angle=self.__q,axis=[0,0,1],unit=self.__unit)
     @property
     def q(self):
         return self.__q
     @q.setter
     def q(self,q):
         self.__q = q
-        Hq_old_inv = self.__Hq.hom_inv
+        self.__update()
+
+    def __update_const(self):
+        """calculates the factor H_theta*H_d*H_a*H_alpha of hom, that does not
+        depend on q, in closed form (see dh() in chain.py)"""
+        if self.__unit == 'deg':
+            to_rad = np.pi/180
+        else:
+            to_rad = 1.
+        self.__H_const = dh(self.__a,self.__alpha*to_rad,self.__d,self.__theta*to_rad)
+
+    def __update_hom(self):
+        """calculates hom = Hq*H_const, Hq only changes the rows of H_const:
+        for a revolute joint rows 0 and 1 are rotated about the z-axis, for a
+        prismatic joint q is added to the z-coordinate of the displacement"""
+        H = self.__H_const.copy()
         if self.__joint == 'p': # prismatic joint
-            self.__Hq = se3(dis=[0,0,self.__q])
+            H[2,3] += self.__q
         else:
-            self.__Hq = se3(dis=[0,0,0],angle=self.__q,axis=[0,0,1],unit=self.__unit)
-        self.__hom = self.__Hq*self.__H_theta*self.__H_d*self.__H_a*self.__H_alpha
-        self.__frame.hom = self.__hom.hom 
+            if self.__unit == 'deg':
+                angle = self.__q / 180. * np.pi
+            else:
+                angle = self.__q
+            c, s = np.cos(angle), np.sin(angle)
+            H[0] = c*self.__H_const[0] - s*self.__H_const[1]
+            H[1] = s*self.__H_const[0] + c*self.__H_const[1]
+        self.__hom = se3._trusted(H)
+
+    def __update(self):
+        self.__update_hom()
+        self.__frame.hom = self.__hom.hom
         self.update_view()
 
     def set_delayed(self,prop='q',incr=1,delay=1,niter=20):
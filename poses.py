@@ -0,0 +1,144 @@
+# This module poses.py provides the python class pose_store, to store long
+# trajectories of poses (e.g. robot logs) compactly in one numpy structured
+# array, with for each pose the displacement (3 floats) and the unit
+# quaternion of the rotation (4 floats), in double (float64) or single
+# (float32) precision. The array can be a memory mapped .npy file, such that
+# logs that do not fit in memory can be used as well.
+#
+# Dependencies:
+# numpy:              for matrices, vectors and linear algebra
+# groups.py:          se3 and se3_array classes
+# quaternions.py:     se3q class and vectorized quaternion functions
+
+# Author:    Rufus Fraanje, p.r.fraanje@hhs.nl
+
+
+from __future__ import division, print_function  # to improve compatibility with python 3
+
+import numpy as np             # numpy for matrix/vector calc.: http://numpy.scipy.org
+
+from groups import *
+from quaternions import se3q, quat_from_rot, rot_from_quat
+
+
+def pose_dtype(dtype=np.float64):
+    """numpy structured data type of one pose: displacement and quaternion"""
+    return np.dtype([('dis',dtype,(3,)),('quat',dtype,(4,))])
+
+def _hom_of(poses):
+    """homogeneous transformation matrices (Nx4x4) of poses, which can be a
+    se3 or se3_array object, a frame (its pose relative to the world), an
+    array of homogeneous transformation matrices, or a list of these"""
+    if isinstance(poses,(se3,se3_array)):
+        return poses.hom.reshape((-1,4,4))
+    if hasattr(poses,'hom_world'):      # frame, see frames.py
+        return poses.hom_world().reshape((-1,4,4))
+    if isinstance(poses,(list,tuple)):
+        return np.concatenate([_hom_of(pose) for pose in poses])
+    return np.array(poses,dtype=float).reshape((-1,4,4))
+
+
+# array of N poses, stored as displacement and unit quaternion (7 floats)
+class pose_store(object):
+    def __init__(self,n=0,dtype=np.float64,filename=None):
+        """initialization of object, with n identity poses in memory, or, if
+        a filename is given, in a new memory mapped .npy file (which can be
+        opened later with pose_store.load(filename))
+        Example:
+        >>> log = pose_store(10**7,dtype=np.float32,filename='log.npy')
+        >>> log[0] = se3(dis=[1,0,0],angle=30)
+        >>> log[1:3] = [se3(angle=10),se3(angle=20)]
+        """
+        if filename is None:
+            self.__data = np.zeros(n,dtype=pose_dtype(dtype))
+        else:
+            self.__data = np.lib.format.open_memmap(filename,mode='w+',dtype=pose_dtype(dtype),shape=(n,))
+        self.__data['quat'][:,0] = 1
+
+    @classmethod
+    def _from_data(cls,data):
+        ret = cls.__new__(cls)
+        ret.__data = data
+        return ret
+
+    @classmethod
+    def load(cls,filename,mmap_mode='r'):
+        """opens a .npy file with poses, memory mapped (by default read only,
+        use mmap_mode='r+' for writing, or None to read it into memory)"""
+        data = np.load(filename,mmap_mode=mmap_mode)
+        if data.dtype.names != ('dis','quat'):
+            raise ValueError("({0}, load): {1} does not contain poses.".format(cls.__name__,filename))
+        return cls._from_data(data)
+
+    @classmethod
+    def from_poses(cls,poses,dtype=np.float64,filename=None):
+        """new pose_store with the poses (se3, se3_array, frame objects, an
+        array of homogeneous transformation matrices or a list of these)"""
+        H = _hom_of(poses)
+        ret = cls(len(H),dtype=dtype,filename=filename)
+        ret[:] = H
+        return ret
+
+    def save(self,filename):
+        np.save(filename,self.__data)
+
+    def flush(self):
+        """writes changes to the file, if the poses are memory mapped"""
+        if isinstance(self.__data,np.memmap):
+            self.__data.flush()
+
+    @property
+    def data(self):
+        """the structured numpy array (or memmap) with fields 'dis' and 'quat'"""
+        return self.__data
+
+    @property
+    def dis(self):
+        """displacements (Nx3), a view on the data"""
+        return self.__data['dis']
+
+    @property
+    def quat(self):
+        """unit quaternions [w,x,y,z] (Nx4), a view on the data"""
+        return self.__data['quat']
+
+    @property
+    def rot(self):
+        """rotation matrices (Nx3x3), calculated from the quaternions"""
+        return rot_from_quat(self.quat)
+
+    @property
+    def hom(self):
+        """homogeneous transformation matrices (Nx4x4), calculated from the
+        quaternions and displacements"""
+        H = np.zeros((len(self),4,4))
+        H[:,0:3,0:3] = self.rot
+        H[:,0:3,3] = self.dis
+        H[:,3,3] = 1
+        return H
+
+    def to_se3_array(self):
+        return se3_array._trusted(self.hom)
+
+    def __len__(self):
+        return self.__data.shape[0]
+
+    def __getitem__(self,index):
+        """integer index returns a se3q object, of which the quaternion and
+        displacement are views on the data (no copy); slices return a
+        pose_store that is a view on the same data (e.g. the same file)"""
+        if isinstance(index,(int,np.integer)):
+            pose = self.__data[index]
+            return se3q._from_quat(pose['quat'],pose['dis'].reshape((3,1)))
+        return pose_store._from_data(self.__data[index])
+
+    def __setitem__(self,index,poses):
+        H = _hom_of(poses)
+        self.__data['dis'][index] = H[:,0:3,3].reshape(self.__data['dis'][index].shape)
+        self.__data['quat'][index] = quat_from_rot(H[:,0:3,0:3]).reshape(self.__data['quat'][index].shape)
+
+    def __repr__(self):
+        string = "{0.__class__.__name__}: ({1} poses, {2})\n\n".format(self,len(self),self.__data['dis'].dtype)
+        string += "dis:\n" + self.dis.__repr__() + "\n\n"
+        string += "quat:\n" + self.quat.__repr__()
+        return string
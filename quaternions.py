@@ -0,0 +1,471 @@
+# This module quaternions.py provides the python classes so3q and se3q, which
+# are rotations and homogeneous transformations like so3 and se3 (see
+# groups.py), but stored as a unit quaternion (and a displacement), instead of
+# a rotation matrix. Composition of quaternions is cheaper than multiplication
+# of matrices, quaternions are easily renormalized and interpolated, and the
+# rotation matrix is only calculated when it is needed.
+# The class dualquat holds arrays of rigid transformations as unit dual
+# quaternions, for vectorized composition, blending and screw interpolation.
+#
+# Dependencies:
+# numpy:              for matrices, vectors and linear algebra
+# transformations.py: for the quaternion functions
+# groups.py:          so3 and se3 classes
+
+# Author:    Rufus Fraanje, p.r.fraanje@hhs.nl
+
+
+from __future__ import division, print_function  # to improve compatibility with python 3
+
+import numpy as np             # numpy for matrix/vector calc.: http://numpy.scipy.org
+import transformations as tf   # for all kind of rotations etc.: http://www.lfd.uci.edu/~gohlke/code/transformations.py.html
+
+from groups import *
+
+
+def _quat_rotate(q,v):
+    """rotates vector v (3x1) with quaternion q = [w,x,y,z], without building
+    the rotation matrix, q is assumed to have unit length"""
+    w, x, y, z = q
+    a, b, c = v.reshape(3)
+    # t = 2 u x v, with u = [x,y,z], and the result is v + w t + u x t
+    t0 = 2*(y*c - z*b)
+    t1 = 2*(z*a - x*c)
+    t2 = 2*(x*b - y*a)
+    return np.array([[a + w*t0 + y*t2 - z*t1],
+                     [b + w*t1 + z*t0 - x*t2],
+                     [c + w*t2 + x*t1 - y*t0]])
+
+
+# so3 stored as a unit quaternion q = [w,x,y,z], since it is a subclass of
+# so3 it can be used wherever a so3 object is expected (e.g. with frames)
+class so3q(so3):
+    __slots__ = ('__quat','__rot')
+    def __init__(self,angle=0,axis=[0,0,1],unit='deg'):
+        """initialization of object, rotation with angle around the vector axis,
+           angle is specified in degrees (default) or radians (unit='rad')"""
+        if unit == 'deg': angle = angle*np.pi/180
+        # otherwise, angle is assumed to be in radians
+        self.__quat = tf.quaternion_about_axis(angle,axis)
+        self.__rot = None # rotation matrix, only calculated when needed
+
+    @classmethod
+    def _from_quat(cls,q):
+        ret = cls.__new__(cls)
+        ret.__quat = q
+        ret.__rot = None
+        return ret
+
+    @property
+    def quat(self):
+        """return or set the quaternion [w,x,y,z]
+        Example:
+        >>> R = so3q(90,axis=[1,0,0])
+        >>> R.quat
+        >>> R.quat = [1,0,0,0]                  # set rotation to identity
+        """
+        return self.__quat
+    @quat.setter
+    def quat(self,q):
+        q = np.array(q,dtype=float).reshape(4)
+        n = np.sqrt(np.dot(q,q))
+        if n > 0:
+            self.__quat = q/n
+            self.__rot = None
+        else:
+            raise ValueError("(class {0.__class__.__name__}, quat): q has zero length.".format(self))
+
+    @property
+    def rot(self):
+        """return or set the rotation matrix, a 3x3 numpy array, which is
+        calculated from the quaternion when needed"""
+        if self.__rot is None:
+            self.__rot = tf.quaternion_matrix(self.__quat)[0:3,0:3]
+        return self.__rot
+    @rot.setter
+    def rot(self,R):
+        R = np.array(R).reshape(3,3)
+        if is_so3(R):
+            M = np.eye(4)
+            M[0:3,0:3] = R
+            self.__quat = tf.quaternion_from_matrix(M,isprecise=True)
+            self.__rot = R
+        else:
+            raise ValueError("(class {0.__class__.__name__}, rot): R is not in so3 (not symmetric and/or det(R)=1)".format(self))
+
+    def normalize(self):
+        """renormalizes the quaternion to unit length (e.g. after many
+        compositions) and returns self"""
+        self.__quat = self.__quat/np.sqrt(np.dot(self.__quat,self.__quat))
+        self.__rot = None
+        return self
+
+    @property
+    def T(self):
+        """returns a new so3q object with the inverse rotation (conjugate quaternion)"""
+        return so3q._from_quat(tf.quaternion_conjugate(self.__quat))
+
+    def interpolate(self,other,fraction):
+        """spherical linear interpolation (slerp) between self (fraction=0)
+        and other (fraction=1)
+        Example:
+        >>> R0 = so3q(0)
+        >>> R1 = so3q(90,axis=[0,1,0])
+        >>> R = R0.interpolate(R1,0.5)          # 45 degrees about y-axis
+        """
+        if not isinstance(other,so3q):
+            other = so3q._from_rot(other.rot)
+        return so3q._from_quat(tf.quaternion_slerp(self.__quat,other.quat,fraction))
+
+    @classmethod
+    def _from_rot(cls,R):
+        ret = cls()
+        ret.rot = R
+        return ret
+
+    def __repr__(self):
+        string = "{0.__class__.__name__}: (rotation, unit quaternion)\n\n".format(self)
+        string += "quat:\n"
+        string += self.quat.__repr__()
+        return string
+
+    def __mul__(self,other):
+        """multiplication of two so3q objects is done with quaternions,
+        multiplication with a so3 object returns a so3 object"""
+        if isinstance(other,so3q):
+            return so3q._from_quat(tf.quaternion_multiply(self.__quat,other.quat))
+        return super(so3q,self).__mul__(other)
+
+    def __rmul__(self,other):
+        if isinstance(other,so3q):
+            return so3q._from_quat(tf.quaternion_multiply(other.quat,self.__quat))
+        return super(so3q,self).__rmul__(other)
+
+
+# se3 stored as a unit quaternion and a displacement
+class se3q(se3):
+    __slots__ = ('__dis','__quat','__hom')
+    def __init__(self,dis=[0,0,0],angle=0,axis=[0,0,1],unit='deg'):
+        """initialization of object, dis = displacement, angle is the angle of
+        rotation around the vector axis, unit is the unit of the angle."""
+        self.__dis = np.array(dis,dtype=float).reshape((3,1))
+        if unit == 'deg': angle = angle*np.pi/180.
+        # otherwise, angle is assumed to be in radians
+        self.__quat = tf.quaternion_about_axis(angle,axis)
+        self.__hom = None # homogeneous matrix, only calculated when needed
+
+    @classmethod
+    def _from_quat(cls,q,dis):
+        ret = cls.__new__(cls)
+        ret.__quat = q
+        ret.__dis = dis
+        ret.__hom = None
+        return ret
+
+    @property
+    def quat(self):
+        """return or set the quaternion [w,x,y,z] of the rotation"""
+        return self.__quat
+    @quat.setter
+    def quat(self,q):
+        q = np.array(q,dtype=float).reshape(4)
+        n = np.sqrt(np.dot(q,q))
+        if n > 0:
+            self.__quat = q/n
+            self.__hom = None
+        else:
+            raise ValueError("(class {0.__class__.__name__}, quat): q has zero length.".format(self))
+
+    @property
+    def dis(self):
+        return self.__dis
+    @dis.setter
+    def dis(self,dis):
+        self.__dis = np.array(dis,dtype=float).reshape((3,1))
+        self.__hom = None
+
+    @property
+    def rot(self):
+        return self.hom[0:3,0:3]
+    @rot.setter
+    def rot(self,R):
+        R = np.array(R).reshape((3,3))
+        if is_so3(R):
+            M = np.eye(4)
+            M[0:3,0:3] = R
+            self.__quat = tf.quaternion_from_matrix(M,isprecise=True)
+            self.__hom = None
+        else:
+            raise ValueError("(class {0.__class__.__name__}, rot): R is not in so3 (not symmetric and/or det(R)=1)".format(self))
+
+    @property
+    def hom(self):
+        """return or set the homogeneous transformation matrix, which is
+        calculated from the quaternion and displacement when needed"""
+        if self.__hom is None:
+            self.__hom = tf.quaternion_matrix(self.__quat)
+            self.__hom[0:3,3] = self.__dis.reshape(3)
+        return self.__hom
+    @hom.setter
+    def hom(self,H):
+        H = np.array(H,dtype=float).reshape((4,4))
+        if is_se3(H):
+            self.__quat = tf.quaternion_from_matrix(H,isprecise=True)
+            self.__dis = H[0:3,3].reshape((3,1)).copy()
+            self.__hom = None
+        else:
+            raise ValueError("(class {0.__class__.__name__}, hom): H is not in se3.".format(self))
+
+    @property
+    def hom_inv(self):
+        return self.inv.hom
+
+    @property
+    def inv(self):
+        """returns the inverse, with conjugate quaternion and displacement -R^T p"""
+        q = tf.quaternion_conjugate(self.__quat)
+        return se3q._from_quat(q,-_quat_rotate(q,self.__dis))
+
+    def normalize(self):
+        """renormalizes the quaternion to unit length (e.g. after many
+        compositions) and returns self"""
+        self.__quat = self.__quat/np.sqrt(np.dot(self.__quat,self.__quat))
+        self.__hom = None
+        return self
+
+    def interpolate(self,other,fraction):
+        """interpolation between self (fraction=0) and other (fraction=1),
+        slerp for the rotation and linear for the displacement"""
+        if not isinstance(other,se3q):
+            H = other
+            other = se3q()
+            other.hom = H.hom
+        q = tf.quaternion_slerp(self.__quat,other.quat,fraction)
+        return se3q._from_quat(q,(1-fraction)*self.__dis + fraction*other.dis)
+
+    def __repr__(self):
+        string = "{0.__class__.__name__}: (homogenous transf., unit quaternion and displacement)\n\n".format(self)
+        string += "quat:\n"
+        string += self.quat.__repr__()
+        string += "\ndis:\n"
+        string += self.dis.__repr__()
+        return string
+
+    def __mul__(self,other):
+        """multiplication of two se3q objects is done with quaternions,
+        multiplication with a se3 object returns a se3 object"""
+        if isinstance(other,se3q):
+            q = tf.quaternion_multiply(self.__quat,other.quat)
+            return se3q._from_quat(q,_quat_rotate(self.__quat,other.dis) + self.__dis)
+        return super(se3q,self).__mul__(other)
+
+    def __rmul__(self,other):
+        if isinstance(other,se3q):
+            return other.__mul__(self)
+        return super(se3q,self).__rmul__(other)
+
+
+# vectorized quaternion functions, for arrays of quaternions (...x4), the
+# transformations.py functions only handle one quaternion at a time
+
+def quat_multiply(q1,q0):
+    """multiplication q1*q0 of (arrays of) quaternions [w,x,y,z], like
+    tf.quaternion_multiply, with broadcasting over the leading dimensions"""
+    w0, x0, y0, z0 = np.moveaxis(q0,-1,0)
+    w1, x1, y1, z1 = np.moveaxis(q1,-1,0)
+    return np.stack((-x1*x0 - y1*y0 - z1*z0 + w1*w0,
+                      x1*w0 + y1*z0 - z1*y0 + w1*x0,
+                     -x1*z0 + y1*w0 + z1*x0 + w1*y0,
+                      x1*y0 - y1*x0 + z1*w0 + w1*z0),axis=-1)
+
+def quat_conjugate(q):
+    """conjugate of (arrays of) quaternions [w,x,y,z]"""
+    return q*np.array([1.,-1.,-1.,-1.])
+
+def rot_from_quat(q):
+    """rotation matrices (...x3x3) from (arrays of) quaternions [w,x,y,z],
+    like tf.quaternion_matrix, the quaternions need not be normalized"""
+    q = np.array(q,dtype=float)
+    q = q*np.sqrt(2.0/np.sum(q*q,axis=-1))[...,None]
+    w, x, y, z = np.moveaxis(q,-1,0)
+    return np.stack((np.stack((1-y*y-z*z, x*y-z*w,   x*z+y*w),axis=-1),
+                     np.stack((x*y+z*w,   1-x*x-z*z, y*z-x*w),axis=-1),
+                     np.stack((x*z-y*w,   y*z+x*w,   1-x*x-y*y),axis=-1)),axis=-2)
+
+def quat_from_rot(R):
+    """unit quaternions [w,x,y,z] (...x4) from (arrays of) rotation matrices
+    (...x3x3), with w >= 0 like tf.quaternion_from_matrix. For every matrix
+    the numerically best of the four possible formulas is used (Shepperd)"""
+    R = np.array(R,dtype=float)
+    m00, m01, m02 = R[...,0,0], R[...,0,1], R[...,0,2]
+    m10, m11, m12 = R[...,1,0], R[...,1,1], R[...,1,2]
+    m20, m21, m22 = R[...,2,0], R[...,2,1], R[...,2,2]
+    # 4*q*q_i for the largest component q_i of q, in each of the four cases
+    K = np.stack((np.stack((1+m00+m11+m22, m21-m12, m02-m20, m10-m01),axis=-1),
+                  np.stack((m21-m12, 1+m00-m11-m22, m01+m10, m02+m20),axis=-1),
+                  np.stack((m02-m20, m01+m10, 1-m00+m11-m22, m12+m21),axis=-1),
+                  np.stack((m10-m01, m02+m20, m12+m21, 1-m00-m11+m22),axis=-1)),axis=-2)
+    i = np.argmax(np.stack((m00+m11+m22,m00,m11,m22),axis=-1),axis=-1)
+    q = np.take_along_axis(K,i[...,None,None],axis=-2)[...,0,:]
+    q = q/np.sqrt(np.sum(q*q,axis=-1))[...,None]
+    return np.where(q[...,0:1] < 0,-q,q)
+
+
+# array of N rigid transformations as unit dual quaternions q_r + eps q_d,
+# with q_r the rotation and q_d = 1/2 t q_r, where t = [0,p] is the
+# displacement, stored as a Nx8 array [q_r, q_d]
+class dualquat(object):
+    def __init__(self,hom=np.eye(4)):
+        """initialization of object, hom is a se3 or se3_array object, a list
+        of se3 objects, a homogeneous transformation matrix (4x4) or an array
+        of them (Nx4x4)
+        Example:
+        >>> D = dualquat(se3(dis=[1,0,0],angle=30))
+        >>> Ds = dualquat(np.tile(np.eye(4),(1000,1,1)))
+        """
+        if isinstance(hom,(se3,se3_array)):
+            hom = hom.hom
+        elif isinstance(hom,(list,tuple)):
+            hom = [h.hom if isinstance(h,se3) else h for h in hom]
+        hom = np.array(hom,dtype=float).reshape((-1,4,4))
+        valid = is_se3_array(hom)[0]
+        if not valid.all():
+            raise ValueError("(class {0.__class__.__name__}): H[{1}] is not in se3.".format(self,np.flatnonzero(~valid)[0]))
+        qr = quat_from_rot(hom[:,0:3,0:3])
+        t = np.hstack((np.zeros((len(hom),1)),hom[:,0:3,3]))
+        self.__dq = np.hstack((qr,0.5*quat_multiply(t,qr)))
+
+    @classmethod
+    def _from_dq(cls,dq):
+        ret = cls.__new__(cls)
+        ret.__dq = dq
+        return ret
+
+    @property
+    def dq(self):
+        """the dual quaternions, a Nx8 array [q_r, q_d]"""
+        return self.__dq
+
+    @property
+    def real(self):
+        """the real parts q_r (Nx4), i.e. the rotations"""
+        return self.__dq[:,0:4]
+
+    @property
+    def dual(self):
+        """the dual parts q_d (Nx4)"""
+        return self.__dq[:,4:8]
+
+    @property
+    def rot(self):
+        return rot_from_quat(self.real)
+
+    @property
+    def dis(self):
+        """displacements (Nx3x1), p from [0,p] = 2 q_d q_r^*"""
+        t = 2*quat_multiply(self.dual,quat_conjugate(self.real))
+        return t[:,1:4,None]
+
+    @property
+    def hom(self):
+        """homogeneous transformation matrices (Nx4x4)"""
+        H = np.zeros((len(self),4,4))
+        H[:,0:3,0:3] = self.rot
+        H[:,0:3,3:4] = self.dis
+        H[:,3,3] = 1
+        return H
+
+    @property
+    def inv(self):
+        """inverse transformations, for unit dual quaternions these are the
+        quaternion conjugates of both parts"""
+        return dualquat._from_dq(np.hstack((quat_conjugate(self.real),quat_conjugate(self.dual))))
+
+    def normalize(self):
+        """returns the dual quaternions scaled to unit length, with the dual
+        part made orthogonal to the real part, e.g. after many multiplications
+        or after blending"""
+        qr = self.real
+        n = np.sqrt(np.sum(qr*qr,axis=1))[:,None]
+        qr = qr/n
+        qd = self.dual/n
+        qd = qd - qr*np.sum(qr*qd,axis=1)[:,None]
+        return dualquat._from_dq(np.hstack((qr,qd)))
+
+    def interpolate(self,other,fraction):
+        """screw linear interpolation (ScLERP) between self (fraction=0) and
+        other (fraction=1), i.e. self*(self^-1*other)^fraction, fraction is a
+        number or an array of N numbers
+        Example:
+        >>> D0 = dualquat(se3())
+        >>> D1 = dualquat(se3(dis=[0,0,1],angle=90))
+        >>> D = D0.interpolate(D1,np.linspace(0,1,10)) # 10 poses along a screw
+        """
+        if not isinstance(other,dualquat):
+            other = dualquat(other)
+        diff = (self.inv*other).dq
+        diff = np.where(diff[:,0:1] < 0,-diff,diff)     # shortest path
+        fraction = np.array(fraction,dtype=float).reshape((-1,1))
+        return self*dualquat._from_dq(_dq_power(diff,fraction))
+
+    def blend(self,weights):
+        """dual quaternion linear blending of the N transformations with
+        weights (N) or (MxN) for M blends, returns a dualquat with 1 or M
+        transformations (e.g. for skinning or blending of poses)"""
+        dq = self.__dq
+        dq = np.where(np.dot(dq[:,0:4],dq[0,0:4])[:,None] < 0,-dq,dq)   # same hemisphere
+        weights = np.array(weights,dtype=float).reshape((-1,len(self)))
+        return dualquat._from_dq(np.dot(weights,dq)).normalize()
+
+    def __len__(self):
+        return self.__dq.shape[0]
+
+    def __getitem__(self,index):
+        return dualquat._from_dq(self.__dq[index].reshape((-1,8)).copy())
+
+    def __repr__(self):
+        string = "{0.__class__.__name__}: ({1} unit dual quaternions [q_r, q_d])\n\n".format(self,len(self))
+        string += "dq:\n"
+        string += self.dq.__repr__()
+        return string
+
+    def __mul__(self,other):
+        """multiplication with another dualquat, or with se3 or se3_array
+        objects (which are converted to dual quaternions), with broadcasting"""
+        if isinstance(other,(se3,se3_array)):
+            other = dualquat(other)
+        elif not isinstance(other,dualquat):
+            return NotImplemented
+        qr1, qd1 = self.real, self.dual
+        qr2, qd2 = other.real, other.dual
+        return dualquat._from_dq(np.hstack((quat_multiply(qr1,qr2),
+                                            quat_multiply(qr1,qd2) + quat_multiply(qd1,qr2))))
+
+    def __rmul__(self,other):
+        if isinstance(other,(se3,se3_array)):
+            return dualquat(other)*self
+        return NotImplemented
+
+
+def _dq_power(dq,fraction):
+    """dq^fraction for unit dual quaternions (Nx8), with the screw parameters:
+    angle theta, axis l, pitch s and moment m, for which
+    q_r = [cos(theta/2), sin(theta/2) l] and
+    q_d = [-s/2 sin(theta/2), sin(theta/2) m + s/2 cos(theta/2) l],
+    the power multiplies theta and s with fraction"""
+    qr, qd = dq[:,0:4], dq[:,4:8]
+    sin_half = np.sqrt(np.sum(qr[:,1:4]**2,axis=1))[:,None]
+    half = np.arctan2(sin_half,qr[:,0:1])
+    pure_translation = sin_half < 1e-9
+    sin_half = np.where(pure_translation,1,sin_half)            # avoid division by 0
+    l = qr[:,1:4]/sin_half
+    s = -2*qd[:,0:1]/sin_half
+    m = (qd[:,1:4] - 0.5*s*np.cos(half)*l)/sin_half
+    half_t = fraction*half
+    s_t = fraction*s
+    qr_t = np.hstack((np.cos(half_t),np.sin(half_t)*l))
+    qd_t = np.hstack((-0.5*s_t*np.sin(half_t),np.sin(half_t)*m + 0.5*s_t*np.cos(half_t)*l))
+    # for a pure translation, q_r = [1,0,0,0] and q_d = [0,p/2] is linear in p
+    qr_t = np.where(pure_translation,np.array([1.,0,0,0]),qr_t)
+    qd_t = np.where(pure_translation,fraction*qd,qd_t)
+    return np.hstack((qr_t,qd_t))